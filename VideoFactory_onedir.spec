@@ -0,0 +1,53 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Klasör (onedir) derlemesi: her açılışta geçici klasöre açma yok, UPX yok -> hızlı başlangıç.
+# Çıktı: dist\AutoShorts\AutoShorts.exe (klasörle birlikte dağıtılır)
+from PyInstaller.utils.hooks import collect_all
+
+datas = [('assets', 'assets')]
+binaries = []
+hiddenimports = ['edge_tts', 'asyncio', 'PIL', 'PIL.Image']
+tmp_ret = collect_all('edge_tts')
+datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
+
+
+a = Analysis(
+    ['src\\main.py'],
+    pathex=[],
+    binaries=binaries,
+    datas=datas,
+    hiddenimports=hiddenimports,
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='AutoShorts',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='AutoShorts',
+)
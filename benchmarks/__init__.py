@@ -0,0 +1 @@
+# AutoShorts render benchmark'ları (ağ ve edge-tts gerektirmez)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Benchmark girdileri: lavfi testsrc2/sine kaynak videoları, Pillow yorum görselleri, sine/sessiz "TTS" sesleri.
+
+Dosyalar parametrelerden türeyen adlarla üretilir; var olanlar yeniden üretilmez (aynı girdiler, aynı ölçüm).
+"""
+import os
+import subprocess
+
+from src.render import get_ffmpeg
+
+# (ad, genişlik, yükseklik, süre sn)
+SOURCES = [
+    ("portrait_10s", 720, 1280, 10),
+    ("landscape_20s", 1280, 720, 20),
+    ("square_5s", 720, 720, 5),
+]
+
+# Yorum i için "TTS" süresi (sn); sine ve sessiz sesler sırayla kullanılır
+COMMENT_DURATIONS = (3.0, 4.5, 2.5)
+
+
+def _ffmpeg(args: list) -> None:
+    cmd = [get_ffmpeg(), "-hide_banner", "-loglevel", "error", "-y"] + args
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+
+def make_source(out_dir: str, name: str, w: int, h: int, duration: float, fps: int = 30) -> str:
+    """testsrc2 görüntü + 440 Hz sine ses, H.264/AAC mp4."""
+    path = os.path.join(out_dir, "src_%s.mp4" % name)
+    if not os.path.isfile(path):
+        _ffmpeg([
+            "-f", "lavfi", "-i", "testsrc2=s=%dx%d:r=%d:d=%s" % (w, h, fps, duration),
+            "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100:d=%s" % duration,
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path,
+        ])
+    return path
+
+
+def make_audio(out_dir: str, idx: int, duration: float) -> str:
+    """Çift indekste sine, tekte sessiz WAV (edge-tts yerine)."""
+    path = os.path.join(out_dir, "tts_%d.wav" % idx)
+    if not os.path.isfile(path):
+        src = ("sine=frequency=%d:sample_rate=24000:d=%s" % (300 + 100 * idx, duration) if idx % 2 == 0
+               else "anullsrc=r=24000:cl=mono:d=%s" % duration)
+        _ffmpeg(["-f", "lavfi", "-i", src, "-t", str(duration), "-c:a", "pcm_s16le", path])
+    return path
+
+
+def make_comment_image(out_dir: str, idx: int) -> str:
+    """Yorum ekran görüntüsü benzeri: beyaz yuvarlak kutu, kullanıcı adı ve iki satır metin."""
+    from PIL import Image, ImageDraw
+    path = os.path.join(out_dir, "comment_%d.png" % idx)
+    if not os.path.isfile(path):
+        img = Image.new("RGBA", (1000, 260), (0, 0, 0, 0))
+        d = ImageDraw.Draw(img)
+        d.rounded_rectangle((0, 0, 999, 259), radius=36, fill=(255, 255, 255, 255), outline=(220, 220, 220, 255), width=3)
+        d.ellipse((30, 30, 110, 110), fill=(37, 99, 235, 255))
+        d.text((130, 40), "kullanici_%d" % (idx + 1), fill=(90, 90, 90, 255))
+        d.text((130, 100), "Benchmark yorumu %d: örnek metin satırı" % (idx + 1), fill=(20, 20, 20, 255))
+        d.text((130, 150), "ikinci satır, biraz daha uzun bir açıklama", fill=(20, 20, 20, 255))
+        img.save(path)
+    return path
+
+
+def make_logo(out_dir: str) -> str:
+    from PIL import Image, ImageDraw
+    path = os.path.join(out_dir, "logo.png")
+    if not os.path.isfile(path):
+        img = Image.new("RGBA", (256, 256), (37, 99, 235, 255))
+        ImageDraw.Draw(img).text((100, 120), "AS", fill=(255, 255, 255, 255))
+        img.save(path)
+    return path
+
+
+def prepare_inputs(out_dir: str, sources: list = None) -> dict:
+    """Tüm girdileri üretir: {"sources": {ad: yol}, "comments": [(görsel, ses, süre)], "logo": yol}."""
+    os.makedirs(out_dir, exist_ok=True)
+    result = {"sources": {}, "comments": [], "logo": make_logo(out_dir)}
+    for name, w, h, duration in (sources or SOURCES):
+        result["sources"][name] = make_source(out_dir, name, w, h, duration)
+    for i, duration in enumerate(COMMENT_DURATIONS):
+        result["comments"].append((make_comment_image(out_dir, i), make_audio(out_dir, i, duration), duration))
+    return result
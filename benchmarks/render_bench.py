@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""run_pipeline benchmark'ı: sentetik girdilerle çözünürlük x fps x yorum sayısı matrisi, JSON sonuç, karşılaştırma.
+
+Örnek:
+    python -m benchmarks.render_bench run --out bench/baseline.json
+    python -m benchmarks.render_bench run --out bench/yeni.json --quick
+    python -m benchmarks.render_bench compare bench/baseline.json bench/yeni.json --threshold 10
+
+Her hücre ayrı bir Python sürecinde çalışır: tepe bellek (RSS) hücreye özgü ölçülür, önbellek kapalıdır.
+"still/..." hücreleri yalnızca yorum klibi encode'unu (durağan kare yolu) ölçer: realtime_x = klip süresi / duvar
+süresi, speedup_vs_plain = durağan x264 ayarları olmadan aynı komuta göre hızlanma, same_headers = iki çıktının
+SPS/PPS'i aynı mı (-c copy birleştirme için gerekli).
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+RESOLUTIONS = ("720p", "1080p")
+FPS_VALUES = ("30", "60")
+COMMENT_COUNTS = (1, 2, 3)
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def _peak_rss_mb(children: bool = False) -> float:
+    """
+    resource.getrusage ru_maxrss (Linux: KB, macOS: byte). children=True: bekleneni en büyük alt süreç (ffmpeg).
+    Windows'ta resource yok: -1.
+    """
+    try:
+        import resource
+    except ImportError:
+        return -1.0
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0, 1)
+
+
+def _child_cpu_sec() -> float:
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _h264_headers(ffmpeg: str, path: str) -> list:
+    """Videonun SPS/PPS NAL birimleri (Annex B'ye çevrilmiş ilk paketten)."""
+    out = subprocess.run([ffmpeg, "-loglevel", "error", "-i", path, "-map", "0:v", "-c:v", "copy",
+                          "-bsf:v", "h264_mp4toannexb", "-frames:v", "1", "-f", "h264", "-"],
+                         capture_output=True).stdout
+    return [n.rstrip(b"\x00").hex() for n in out.split(b"\x00\x00\x01") if n and n[0] & 0x1f in (7, 8)]
+
+
+def run_still_cell(cell: dict) -> dict:
+    """
+    Durağan yorum klibi hücresi (bu süreçte): kaynak ilk karesi + yorum görseli PNG'ye bir kez birleştirilir,
+    sonra render_comment'in encode komutu (_build_still_clip_cmd) durağan ayarlarla ve ayarsız çalıştırılır.
+    """
+    from src.render import (RESOLUTION_PARAMS, AUDIO_PARAMS, _encode_args, _still_encode_args,
+                            _build_still_clip_cmd, _run, get_ffmpeg)
+
+    ffmpeg = get_ffmpeg()
+    out_w, out_h, crf, preset = RESOLUTION_PARAMS[cell["resolution"]]
+    fps = int(cell["fps"])
+    audio = AUDIO_PARAMS[cell["resolution"]]
+    img, tts, dur = cell["comments"][0]
+    tmp = tempfile.mkdtemp(prefix="vf_bench_")
+    try:
+        still = os.path.join(tmp, "still.png")
+        _run([ffmpeg, "-y", "-i", cell["video"], "-i", img, "-filter_complex",
+              "[0:v]scale=%d:%d,setsar=1[b];[b][1:v]overlay=(W-w)/2:(H-h)/2[v]" % (out_w, out_h),
+              "-map", "[v]", "-frames:v", "1", "-f", "image2", "-update", "1", still])
+        still_args = _still_encode_args(preset, crf, fps, audio, dur)
+        n_frames = still_args[0]
+        variants = (
+            ("still", still_args),
+            ("plain", (n_frames, _encode_args(preset, crf, fps, audio) + ["-tune", "stillimage", "-g", str(n_frames)])),
+        )
+        res = {"ok": os.path.isfile(still), "clip_sec": dur}
+        for name, args in variants:
+            out = os.path.join(tmp, name + ".mp4")
+            cpu0, t0 = _child_cpu_sec(), time.perf_counter()
+            rc = _run(_build_still_clip_cmd(ffmpeg, still, tts, dur, fps, args, out))
+            res[name + "_wall_sec"] = round(time.perf_counter() - t0, 3)
+            res[name + "_cpu_sec"] = round(_child_cpu_sec() - cpu0, 3)
+            res[name + "_size_bytes"] = os.path.getsize(out) if rc == 0 and os.path.isfile(out) else 0
+            res["ok"] = res["ok"] and rc == 0
+        headers = [_h264_headers(ffmpeg, os.path.join(tmp, name + ".mp4")) for name, _ in variants]
+        res["same_headers"] = bool(headers[0]) and headers[0] == headers[1]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    res["wall_sec"] = res["still_wall_sec"]
+    res["realtime_x"] = round(dur / res["still_wall_sec"], 2) if res["still_wall_sec"] else 0.0
+    res["speedup_vs_plain"] = round(res["plain_wall_sec"] / res["still_wall_sec"], 2) if res["still_wall_sec"] else 0.0
+    res["children_peak_rss_mb"] = _peak_rss_mb(children=True)
+    return res
+
+
+def run_cell(cell: dict) -> dict:
+    """Tek hücre (bu süreçte): run_pipeline süresi, trace'ten aşama süreleri ve ffmpeg CPU'su, tepe RSS."""
+    from src.render import run_pipeline
+    from src.trace import Tracer
+
+    if cell.get("kind") == "still":
+        return run_still_cell(cell)
+    tracer = Tracer(cell.get("trace_path") or None, context={"cell": cell_key(cell)})
+    t0 = time.perf_counter()
+
+    segments = [{
+        "comment_image_path": img, "tts_audio_path": audio, "tts_duration_sec": dur,
+    } for img, audio, dur in cell["comments"][:cell["n"]]]
+    tmp = tempfile.mkdtemp(prefix="vf_bench_")
+    try:
+        out = os.path.join(tmp, "out.mp4")
+        result = run_pipeline(
+            video_path=cell["video"],
+            logo_path=cell["logo"],
+            channel_name="Benchmark",
+            username="@benchmark",
+            comment_segments=segments,
+            output_path=out,
+            quality_resolution=cell["resolution"],
+            quality_fps=cell["fps"],
+            post_text="Benchmark videosu",
+            render_mode=cell["render_mode"],
+            max_workers=cell["max_workers"],
+            use_cache=False,
+            tracer=tracer,
+        )
+        wall = time.perf_counter() - t0
+        size = os.path.getsize(out) if result and os.path.isfile(out) else 0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "ok": bool(result),
+        "wall_sec": round(wall, 3),
+        "size_bytes": size,
+        "stages": {k: v for k, v in result.stage_seconds().items() if k != "pipeline"},
+        "child_cpu_sec": round(sum(r.get("child_cpu_sec") or 0.0 for r in result.stages), 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "children_peak_rss_mb": _peak_rss_mb(children=True),
+    }
+
+
+def _run_cell_subprocess(cell: dict) -> dict:
+    cmd = [sys.executable, "-m", "benchmarks.render_bench", "_cell", json.dumps(cell)]
+    p = subprocess.run(cmd, capture_output=True, text=True)
+    for line in reversed(p.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    return {"ok": False, "error": (p.stderr or p.stdout)[-2000:]}
+
+
+def _ffmpeg_version() -> str:
+    from src.render import get_ffmpeg
+    try:
+        out = subprocess.check_output([get_ffmpeg(), "-version"], text=True, stderr=subprocess.DEVNULL)
+        return out.splitlines()[0]
+    except Exception:
+        return ""
+
+
+def cell_key(c: dict) -> str:
+    if c.get("kind") == "still":
+        return "still/%s/%s/%sfps" % (c["source"], c["resolution"], c["fps"])
+    return "%s/%s/%sfps/n%d/%s/w%d" % (c["source"], c["resolution"], c["fps"], c["n"], c["render_mode"], c["max_workers"])
+
+
+def run_matrix(args) -> dict:
+    from benchmarks.inputs import SOURCES, prepare_inputs
+
+    sources = SOURCES[:1] if args.quick else SOURCES
+    if args.source:
+        sources = [s for s in SOURCES if s[0] in args.source]
+    inputs = prepare_inputs(args.inputs_dir, sources)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": _ffmpeg_version(),
+        "repeat": args.repeat,
+        "cells": [],
+    }
+    for source_name, _, _, _ in sources:
+        for resolution in args.resolution or RESOLUTIONS:
+            for fps in args.fps or FPS_VALUES:
+                for n in args.comments or COMMENT_COUNTS:
+                    cell = {
+                        "source": source_name, "video": inputs["sources"][source_name], "logo": inputs["logo"],
+                        "comments": inputs["comments"], "resolution": resolution, "fps": fps, "n": n,
+                        "render_mode": args.render_mode, "max_workers": args.max_workers,
+                        "trace_path": args.trace,
+                    }
+                    runs = [_run_cell_subprocess(cell) for _ in range(max(1, args.repeat))]
+                    good = [r for r in runs if r.get("ok")]
+                    entry = {k: cell[k] for k in ("source", "resolution", "fps", "n", "render_mode", "max_workers")}
+                    entry["key"] = cell_key(cell)
+                    entry["ok"] = len(good) == len(runs)
+                    if good:
+                        walls = [r["wall_sec"] for r in good]
+                        entry["wall_sec"] = round(statistics.median(walls), 3)
+                        entry["wall_sec_min"] = min(walls)
+                        entry["size_bytes"] = good[0]["size_bytes"]
+                        entry["peak_rss_mb"] = max(r["peak_rss_mb"] for r in good)
+                        entry["children_peak_rss_mb"] = max(r["children_peak_rss_mb"] for r in good)
+                        entry["child_cpu_sec"] = round(statistics.median(r["child_cpu_sec"] for r in good), 3)
+                        entry["stages"] = good[len(good) // 2]["stages"]
+                    else:
+                        entry["error"] = runs[-1].get("error", "")
+                    report["cells"].append(entry)
+                    print("%-40s %s" % (entry["key"], ("%.2f sn" % entry["wall_sec"]) if good else "HATA"))
+            if not args.no_still:
+                for fps in args.fps or FPS_VALUES:
+                    report["cells"].append(_run_still(args, source_name, resolution, fps, inputs))
+    return report
+
+
+def _run_still(args, source_name: str, resolution: str, fps: str, inputs: dict) -> dict:
+    """Durağan yorum klibi hücresi: medyan süre, gerçek zamana oran ve STILL_X264_PARAMS'sız komuta göre hızlanma."""
+    cell = {
+        "kind": "still", "source": source_name, "video": inputs["sources"][source_name],
+        "comments": inputs["comments"], "resolution": resolution, "fps": fps,
+    }
+    runs = [_run_cell_subprocess(cell) for _ in range(max(1, args.repeat))]
+    good = [r for r in runs if r.get("ok")]
+    entry = {"kind": "still", "source": source_name, "resolution": resolution, "fps": fps, "key": cell_key(cell),
+             "ok": len(good) == len(runs)}
+    if good:
+        mid = sorted(good, key=lambda r: r["wall_sec"])[len(good) // 2]
+        for k in ("wall_sec", "clip_sec", "realtime_x", "speedup_vs_plain", "still_cpu_sec", "plain_wall_sec",
+                  "plain_cpu_sec", "still_size_bytes", "plain_size_bytes", "same_headers", "children_peak_rss_mb"):
+            entry[k] = mid[k]
+        print("%-40s %.2f sn (%.1fx gerçek zaman, ayarsıza göre %.2fx%s)" % (
+            entry["key"], entry["wall_sec"], entry["realtime_x"], entry["speedup_vs_plain"],
+            "" if entry["same_headers"] else ", SPS/PPS FARKLI"))
+        entry["ok"] = entry["ok"] and entry["same_headers"]
+    else:
+        entry["error"] = runs[-1].get("error", "")
+        print("%-40s HATA" % entry["key"])
+    return entry
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """Ortak hücrelerde medyan süre farkını yazdırır; threshold (%) üstü yavaşlama varsa 1 döner."""
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = {c["key"]: c for c in json.load(f)["cells"]}
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = {c["key"]: c for c in json.load(f)["cells"]}
+    worse = 0
+    print("%-40s %9s %9s %8s %9s" % ("hücre", "önce sn", "sonra sn", "fark %", "RSS MB"))
+    for key in sorted(set(base) & set(new)):
+        b, n = base[key], new[key]
+        if not (b.get("ok") and n.get("ok")):
+            print("%-40s %s" % (key, "başarısız hücre, atlandı"))
+            continue
+        delta = 100.0 * (n["wall_sec"] - b["wall_sec"]) / b["wall_sec"] if b["wall_sec"] else 0.0
+        flag = ""
+        if delta > threshold:
+            worse += 1
+            flag = "  YAVAŞ"
+        print("%-40s %9.2f %9.2f %+8.1f %9.1f%s" % (key, b["wall_sec"], n["wall_sec"], delta, n.get("children_peak_rss_mb", -1), flag))
+    missing = sorted(set(base) ^ set(new))
+    if missing:
+        print("Yalnızca bir dosyada olan hücreler: " + ", ".join(missing))
+    print("%d hücre %%%.0f eşiğinden yavaş." % (worse, threshold))
+    return 1 if worse else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoShorts - run_pipeline benchmark'ı (çevrimdışı)")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="{run,compare}")
+
+    p_run = sub.add_parser("run", help="Matrisi çalıştır, JSON yaz")
+    p_run.add_argument("--out", default="bench_results.json", help="Sonuç JSON yolu")
+    p_run.add_argument("--inputs_dir", default=os.path.join("bench", "inputs"), help="Sentetik girdi klasörü (tekrar kullanılır)")
+    p_run.add_argument("--quick", action="store_true", help="Yalnızca ilk kaynak video")
+    p_run.add_argument("--source", action="append", help="Kaynak adı (portrait_10s, landscape_20s, square_5s)")
+    p_run.add_argument("--resolution", action="append", choices=RESOLUTIONS)
+    p_run.add_argument("--fps", action="append", choices=FPS_VALUES)
+    p_run.add_argument("--comments", action="append", type=int, choices=COMMENT_COUNTS)
+    p_run.add_argument("--render_mode", default="multi", choices=("multi", "single"))
+    p_run.add_argument("--max_workers", type=int, default=1)
+    p_run.add_argument("--repeat", type=int, default=1, help="Hücre başına tekrar (medyan alınır)")
+    p_run.add_argument("--no_still", action="store_true", help="Durağan yorum klibi (still/...) hücrelerini atla")
+    p_run.add_argument("--trace", default="", help="Tüm hücrelerin aşama kayıtlarını bu JSONL dosyasına ekle")
+
+    p_cmp = sub.add_parser("compare", help="İki sonuç dosyasını karşılaştır")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("new")
+    p_cmp.add_argument("--threshold", type=float, default=10.0, help="Yavaşlama eşiği (%%)")
+
+    p_cell = sub.add_parser("_cell")
+    p_cell.add_argument("cell_json")
+
+    args = parser.parse_args()
+    if args.command == "_cell":
+        print(RESULT_PREFIX + json.dumps(run_cell(json.loads(args.cell_json))))
+        return
+    if args.command == "compare":
+        sys.exit(compare(args.baseline, args.new, args.threshold))
+
+    report = run_matrix(args)
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print("Sonuç:", args.out)
+    if not all(c["ok"] for c in report["cells"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Başlangıç süresi benchmark'ı: `python -X importtime` ile senaryo başına import süresi ve yüklenen modüller.
+
+Örnek:
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --repeat 9 --out bench/startup.json
+
+Bütçe benchmarks/startup_budget.json'dadır: senaryo başına import_ms üst sınırı ve yüklenmemesi gereken
+modüller (Pillow, edge_tts, tkinter, asyncio). Aşım varsa 1 ile çıkar.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+BUDGET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ad -> python argümanları (-X importtime sonrası). Var olmayan dosyalar: doğrulama aşamasında çıkılır.
+SCENARIOS = {
+    "cli_help": ["-m", "src.main", "--help"],
+    "cli_validate": ["-m", "src.main", "--video", "_yok_.mp4", "--comment_image", "_yok_.png",
+                     "--comment_text", "x", "--out", "_yok_out.mp4"],
+    "batch_validate": ["-c", "import src.batch"],
+    "server_import": ["-c", "import src.server"],
+}
+
+
+def parse_importtime(stderr: str) -> tuple:
+    """-X importtime çıktısı -> (üst düzey importların toplam süresi ms, yüklenen modül adları)."""
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # başlık satırı
+        name = parts[2].rstrip()
+        modules.add(name.strip())
+        if not name.startswith("  "):  # girintisiz = en üst düzey import (alt importlar cumulative'e dahil)
+            total_us += int(parts[1])
+    return total_us / 1000.0, modules
+
+
+def run_scenario(args: list) -> dict:
+    cmd = [sys.executable, "-X", "importtime"] + args
+    t0 = time.perf_counter()
+    p = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    import_ms, modules = parse_importtime(p.stderr)
+    return {"import_ms": import_ms, "wall_ms": wall_ms, "modules": modules, "rc": p.returncode}
+
+
+def measure(names: list, repeat: int) -> dict:
+    """Senaryo başına medyan import/duvar süresi ve (tüm tekrarlarda) yüklenen modüller."""
+    results = {}
+    for name in names:
+        runs = [run_scenario(SCENARIOS[name]) for _ in range(max(1, repeat))]
+        results[name] = {
+            "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+            "wall_ms": round(statistics.median(r["wall_ms"] for r in runs), 1),
+            "module_count": len(runs[0]["modules"]),
+            "modules": sorted(set().union(*(r["modules"] for r in runs))),
+        }
+    return results
+
+
+def check_budget(results: dict, budget: dict) -> list:
+    """Bütçe aşımları (metin listesi)."""
+    problems = []
+    for name, res in results.items():
+        b = budget.get(name) or {}
+        limit = b.get("import_ms")
+        if limit is not None and res["import_ms"] > limit:
+            problems.append("%s: import %.1f ms > bütçe %.1f ms" % (name, res["import_ms"], limit))
+        for mod in b.get("forbidden") or ():
+            if any(m == mod or m.startswith(mod + ".") for m in res["modules"]):
+                problems.append("%s: %s yüklenmemeli" % (name, mod))
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoShorts - başlangıç (import) süresi benchmark'ı")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Yalnızca bu senaryo(lar)")
+    parser.add_argument("--repeat", type=int, default=5, help="Senaryo başına tekrar (medyan alınır)")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="Bütçe JSON yolu")
+    parser.add_argument("--out", default="", help="Sonuçları bu JSON dosyasına yaz")
+    args = parser.parse_args()
+
+    with open(args.budget, "r", encoding="utf-8") as f:
+        budget = json.load(f)
+    results = measure(args.scenario or list(SCENARIOS), args.repeat)
+
+    print("%-16s %10s %10s %8s %10s" % ("senaryo", "import ms", "duvar ms", "modül", "bütçe ms"))
+    for name, res in results.items():
+        limit = (budget.get(name) or {}).get("import_ms")
+        print("%-16s %10.1f %10.1f %8d %10s" % (
+            name, res["import_ms"], res["wall_ms"], res["module_count"], "-" if limit is None else "%.0f" % limit))
+    if args.out:
+        out_dir = os.path.dirname(args.out)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results},
+                      f, ensure_ascii=False, indent=2)
+        print("Sonuç:", args.out)
+
+    problems = check_budget(results, budget)
+    for p in problems:
+        print("BÜTÇE AŞILDI: " + p)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
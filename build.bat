@@ -1,11 +1,20 @@
 @echo off
+rem Kullanim: build.bat          -> tek dosya dist\AutoShorts.exe
+rem           build.bat onedir   -> klasor dist\AutoShorts\AutoShorts.exe (acilis daha hizli, script/toplu is icin)
 echo PyInstaller kontrol ediliyor...
 python -m pip install pyinstaller --quiet
-echo AutoShorts EXE olusturuluyor...
-python -m PyInstaller --noconfirm VideoFactory.spec
+if /I "%~1"=="onedir" (
+  echo AutoShorts klasor derlemesi olusturuluyor...
+  python -m PyInstaller --noconfirm VideoFactory_onedir.spec
+  set "OUT=dist\AutoShorts\AutoShorts.exe"
+) else (
+  echo AutoShorts EXE olusturuluyor...
+  python -m PyInstaller --noconfirm VideoFactory.spec
+  set "OUT=dist\AutoShorts.exe"
+)
 echo.
-if exist "dist\AutoShorts.exe" (
-  echo Basarili! EXE: dist\AutoShorts.exe
+if exist "%OUT%" (
+  echo Basarili! EXE: %OUT%
 ) else (
   echo Hata: EXE olusturulamadi.
 )
@@ -1,11 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
-import edge_tts
-import asyncio
 import threading
 import os
 import sys
 
+from src.tts import generate_tts_many
+from src.voices import load_cached_voices, refresh_voices_async, voice_names, VOICES_TTL_SEC
+
 
 def get_app_dir():
     """Exe veya script çalışma dizinini döndür"""
@@ -112,24 +113,21 @@ class TTSApp:
         return os.path.join(folder, name)
     
     def check_voice_availability(self):
-        def load_voices():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                voices = loop.run_until_complete(edge_tts.list_voices())
-                loop.close()
-                turkish_voices = [v for v in voices if v["Locale"].startswith("tr-TR")]
-                voice_names = [f"{v['ShortName']} ({v['Gender']})" for v in turkish_voices]
-                if turkish_voices:
-                    first_voice = turkish_voices[0]["ShortName"]
-                    self.voice = first_voice
-                    self.root.after(0, lambda: self.voice_var.set(first_voice))
-                self.root.after(0, lambda: self.voice_combo.config(values=voice_names))
-                self.root.after(0, lambda: self.update_status("Sesler yüklendi"))
-            except Exception as e:
-                self.root.after(0, lambda: self.update_status(f"Hata: {str(e)}"))
-        threading.Thread(target=load_voices, daemon=True).start()
-    
+        """Sesler önce voices.json önbelleğinden; önbellek eskiyse arka planda ağdan yenilenir."""
+        def apply(voices, status):
+            turkish_voices = [v for v in voices if v["Locale"].startswith("tr-TR")]
+            self.voice_combo.config(values=voice_names(voices))
+            if turkish_voices and self.voice_var.get() not in [v["ShortName"] for v in turkish_voices]:
+                self.voice = turkish_voices[0]["ShortName"]
+                self.voice_var.set(self.voice)
+            self.update_status(status)
+
+        voices, _ = load_cached_voices()
+        if voices:
+            apply(voices, "Sesler yüklendi (önbellek)")
+        refresh_voices_async(lambda v: self.root.after(0, lambda: apply(v, "Sesler yüklendi")),
+                             max_age=VOICES_TTL_SEC if voices else -1)
+
     def update_status(self, message):
         self.status_label.config(text=message)
     
@@ -148,13 +146,9 @@ class TTSApp:
         
         def play():
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                async def speak():
-                    communicate = edge_tts.Communicate(text, voice)
-                    await communicate.save(temp_path)
-                loop.run_until_complete(speak())
-                loop.close()
+                _, duration = generate_tts_many([(text, voice, temp_path)])[0]
+                if duration <= 0:
+                    raise RuntimeError("Ses üretilemedi.")
                 if self.is_playing:
                     os.startfile(temp_path)
                     self.root.after(0, lambda: self.update_status("Tamamlandı"))
@@ -193,13 +187,9 @@ class TTSApp:
         
         def save():
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                async def speak():
-                    communicate = edge_tts.Communicate(text, voice)
-                    await communicate.save(filepath)
-                loop.run_until_complete(speak())
-                loop.close()
+                _, duration = generate_tts_many([(text, voice, filepath)])[0]
+                if duration <= 0:
+                    raise RuntimeError("Ses üretilemedi.")
                 self.root.after(0, lambda: self.update_status(f"Kaydedildi: {os.path.basename(filepath)}"))
                 self.root.after(0, lambda: messagebox.showinfo("Başarılı", f"Dosya kaydedildi:\n{filepath}"))
             except Exception as e:
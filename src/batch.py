@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""Toplu render: JSONL iş dosyasındaki her satır bir short. Tek süreçte, sınırlı eşzamanlılıkla çalışır.
+
+Satır örneği:
+    {"video": "klip.mp4", "comments": [{"text": "Yorum", "image": "y1.png"}], "channel": "Kanal",
+     "resolution": "1080p", "fps": "30", "out": "cikti/klip.mp4"}
+"video" yerine "url" (TikTok) verilebilir. İsteğe bağlı: "voice", "post_text", "render_mode", "max_workers", "use_cache",
+"offline" (TikTok videosu yalnızca kaynak kütüphanesinden).
+"""
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Callable
+
+from src.config import load_channels, load_settings
+from src.render import RESOLUTION_PARAMS, RENDER_MODES
+from src.voices import validate_voice
+
+DEFAULT_VOICE = "tr-TR-AhmetNeural"
+
+
+def load_jobs(path: str) -> list:
+    """JSONL dosyasını okur. Boş ve '#' ile başlayan satırlar atlanır; bozuk satır {"_error": ...} olur."""
+    jobs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                job = json.loads(line)
+                if not isinstance(job, dict):
+                    raise ValueError("satır bir JSON nesnesi değil")
+            except Exception as e:
+                job = {"_error": f"Satır {line_no}: {e}"}
+            job["_line"] = line_no
+            jobs.append(job)
+    return jobs
+
+
+# Metin olması gereken iş alanları (JSON'da sayı/liste gelirse doğrulamada reddedilir)
+_TEXT_FIELDS = ("video", "url", "out", "channel", "voice", "post_text", "resolution", "render_mode")
+
+
+def validate_job(job: dict, channels: list, voices: Optional[list] = None) -> Optional[str]:
+    """Hata mesajı döner, iş geçerliyse None. voices verilirse "voice" alanı katalogda aranır."""
+    if job.get("_error"):
+        return job["_error"]
+    for name in _TEXT_FIELDS:
+        if job.get(name) is not None and not isinstance(job[name], str):
+            return "'%s' metin olmalı." % name
+    if not job.get("video") and not job.get("url"):
+        return "'video' veya 'url' gerekli."
+    if job.get("video") and not os.path.isfile(job["video"]):
+        return "Video dosyası bulunamadı: " + job["video"]
+    comments = job.get("comments") or []
+    if not isinstance(comments, list):
+        return "'comments' bir liste olmalı."
+    if not 1 <= len(comments) <= 3:
+        return "1-3 yorum gerekli."
+    for i, c in enumerate(comments):
+        if not isinstance(c, dict):
+            return "Yorum %d bir JSON nesnesi olmalı." % (i + 1)
+        if not isinstance(c.get("text") or "", str) or not isinstance(c.get("image") or "", str):
+            return "Yorum %d: 'text' ve 'image' metin olmalı." % (i + 1)
+        if not (c.get("text") or "").strip():
+            return "Yorum %d için metin gerekli." % (i + 1)
+        if not c.get("image") or not os.path.isfile(c["image"]):
+            return "Yorum %d görseli bulunamadı: %s" % (i + 1, c.get("image"))
+    if not job.get("out"):
+        return "'out' gerekli."
+    if job.get("channel") and not any(c.get("channel_name") == job["channel"] for c in channels):
+        return "Kanal profili bulunamadı: " + job["channel"]
+    if job.get("resolution", "1080p") not in RESOLUTION_PARAMS:
+        return "Geçersiz çözünürlük: " + str(job.get("resolution"))
+    if str(job.get("fps", "30")) not in ("30", "60"):
+        return "Geçersiz fps: " + str(job.get("fps"))
+    max_workers = job.get("max_workers")
+    if max_workers is not None and (isinstance(max_workers, bool) or not isinstance(max_workers, int)):
+        return "'max_workers' tam sayı olmalı."
+    if job.get("render_mode", "multi") not in RENDER_MODES:
+        return "Geçersiz render modu: " + str(job.get("render_mode"))
+    if job.get("voice") and validate_voice(job["voice"], voices or []) is False:
+        return "Bilinmeyen TTS sesi: " + job["voice"]
+    return None
+
+
+def _empty_logo(tmp_dir: str) -> str:
+    from PIL import Image
+    path = os.path.join(tmp_dir, "empty_logo.png")
+    Image.new("RGBA", (1, 1), (0, 0, 0, 0)).save(path)
+    return path
+
+
+def _job_flag(job: dict, defaults: dict, name: str, default):
+    return job.get(name, defaults.get(name, default))
+
+
+def _new_result(job: dict) -> dict:
+    return {"line": job.get("_line"), "out": job.get("out"), "status": "failed", "error": None, "seconds": 0.0,
+            "stages": {}}
+
+
+def _prepare_job(job: dict, defaults: dict, log, cancel_event, tracer, tmp_dir: str) -> tuple:
+    """Ağ aşamaları: indirme (url verildiyse) + TTS. (video_yolu, yorum segmentleri, hata) döner."""
+    from src.tts import generate_tts_many
+    from src.download import download_tiktok_video
+
+    if cancel_event is not None and cancel_event.is_set():
+        return None, None, "İptal edildi."
+    use_cache = bool(_job_flag(job, defaults, "use_cache", True))
+    video_path = job.get("video")
+    if not video_path:
+        log("TikTok videosu indiriliyor...")
+        downloaded = []  # Çıktı yolu aşama bitmeden eklenir; boyutu trace'e yazılır
+        with tracer.stage("download", outputs=downloaded) as rec:
+            video_path = download_tiktok_video(
+                job["url"], tmp_dir, defaults.get("cookies_file", ""), log_cb=log, use_library=use_cache,
+                offline=bool(_job_flag(job, defaults, "offline", False)), record=rec,
+                cancel_event=cancel_event,
+            )
+            downloaded.append(video_path)
+        if cancel_event is not None and cancel_event.is_set():
+            return None, None, "İptal edildi."
+        if not video_path or not os.path.isfile(video_path):
+            return None, None, "Video indirilemedi."
+
+    voice = job.get("voice") or defaults.get("voice") or DEFAULT_VOICE
+    tts_items = [(c["text"], voice, os.path.join(tmp_dir, "tts_%d.mp3" % i)) for i, c in enumerate(job["comments"])]
+    with tracer.stage("tts", outputs=[path for _, _, path in tts_items]):
+        tts_results = generate_tts_many(tts_items, use_cache=use_cache, log_cb=log, cancel_event=cancel_event)
+    if cancel_event is not None and cancel_event.is_set():
+        return None, None, "İptal edildi."
+    comment_segments = []
+    for i, (c, (tts_path, duration_sec)) in enumerate(zip(job["comments"], tts_results)):
+        if duration_sec <= 0:
+            return None, None, "TTS üretilemedi (yorum %d)." % (i + 1)
+        comment_segments.append({
+            "comment_image_path": c["image"],
+            "tts_audio_path": tts_path,
+            "tts_duration_sec": duration_sec,
+        })
+    return video_path, comment_segments, None
+
+
+def _render_job(job: dict, channels: list, defaults: dict, log, cancel_event, progress_cb, tracer, tmp_dir: str,
+                video_path: str, comment_segments: list) -> Optional[str]:
+    """CPU aşaması: run_pipeline. Hata mesajı döner, başarılıysa None."""
+    from src.render import run_pipeline
+
+    if cancel_event is not None and cancel_event.is_set():
+        return "İptal edildi."
+    channel = next((c for c in channels if c.get("channel_name") == job.get("channel")), {})
+    logo_path = channel.get("logo_path", "")
+    if not logo_path or not os.path.isfile(logo_path):
+        logo_path = _empty_logo(tmp_dir)
+
+    ok = run_pipeline(
+        video_path=video_path,
+        logo_path=logo_path,
+        channel_name=channel.get("channel_name", ""),
+        username=channel.get("username", ""),
+        comment_segments=comment_segments,
+        output_path=job["out"],
+        log_cb=log,
+        quality_resolution=job.get("resolution", "1080p"),
+        quality_fps=str(job.get("fps", "30")),
+        post_text=job.get("post_text", ""),
+        render_mode=_job_flag(job, defaults, "render_mode", "multi"),
+        max_workers=max(1, int(_job_flag(job, defaults, "max_workers", 1))),
+        use_cache=bool(_job_flag(job, defaults, "use_cache", True)),
+        cancel_event=cancel_event,
+        progress_cb=progress_cb,
+        tracer=tracer,
+    )
+    if ok:
+        return None
+    if cancel_event is not None and cancel_event.is_set():
+        return "İptal edildi."
+    return ok.error or "Render başarısız."
+
+
+DEFAULT_PREP_WORKERS = 2
+DEFAULT_LOOKAHEAD = 2
+
+
+class PipelinedExecutor:
+    """
+    İki aşamalı iş kuyruğu: hazırlık (indirme + TTS, ağ ağırlıklı) ve render (run_pipeline, CPU ağırlıklı) ayrı
+    thread havuzlarında çalışır; k+1. işin hazırlığı k. işin encode'u sürerken yapılır.
+    lookahead: render'ı başlamamış, hazırlığı başlamış en fazla iş sayısı. Hazırlanan dosyalar (indirilen video,
+    TTS) render bitene kadar diskte kaldığından disk kullanımı render_workers + lookahead iş ile sınırlıdır.
+    Render'lar gönderim sırasıyla başlar (hazırlığı önce biten iş sırasını beklemez; başarısız hazırlık sırayı tutmaz).
+    """
+
+    def __init__(self, defaults: dict = None, render_workers: int = 1, prep_workers: int = DEFAULT_PREP_WORKERS,
+                 lookahead: int = DEFAULT_LOOKAHEAD):
+        self.defaults = dict(defaults or {})
+        self._prep = ThreadPoolExecutor(max_workers=max(1, prep_workers), thread_name_prefix="prep")
+        self._render = ThreadPoolExecutor(max_workers=max(1, render_workers), thread_name_prefix="render")
+        # Slotlar gönderim sırasıyla alınır: sonraki işler tüm slotları alıp öndeki işi bekleyerek kilitlenemez
+        self._slot_cond = threading.Condition()
+        self._free_slots = max(1, render_workers) + max(0, lookahead)
+        self._slot_seq = 0  # Slot sırası gelen gönderim numarası
+        self._order_lock = threading.Lock()
+        self._next_seq = 0  # Sonraki gönderim numarası
+        self._render_seq = 0  # Render'a verilecek sıradaki numara
+        self._ready = {}  # numara -> render argümanları (None: hazırlık başarısız, atla)
+
+    def submit(self, job: dict, channels: list, log_cb: Optional[Callable[[str], None]] = None,
+               cancel_event: Optional[threading.Event] = None,
+               progress_cb: Optional[Callable[[dict], None]] = None,
+               state_cb: Optional[Callable[[str], None]] = None) -> Future:
+        """
+        İşi kuyruğa ekler. Future sonucu: {"line", "out", "status", "error", "seconds", "stages"}; stages: aşama
+        adı -> süre (sn), defaults["trace_path"] verilirse aşama kayıtları o JSONL'e eklenir. cancel_event set
+        edilirse iş başlamaz / aşamalar arasında durur, çalışan ffmpeg öldürülür. progress_cb: run_pipeline
+        ilerleme olayları. state_cb: "preparing" / "waiting" / "rendering" aşama değişimleri (iş thread'lerinden).
+        """
+        fut = Future()
+        with self._order_lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._prep.submit(self._prepare, seq, fut, job, channels, log_cb, cancel_event, progress_cb, state_cb)
+        return fut
+
+    def _handoff(self, seq: int, args: Optional[tuple]) -> None:
+        """Hazırlığı biten işi sıra numarasına göre render havuzuna verir; önündeki işler bitene kadar bekletir."""
+        with self._order_lock:
+            self._ready[seq] = args
+            while self._render_seq in self._ready:
+                ready = self._ready.pop(self._render_seq)
+                self._render_seq += 1
+                if ready is None:
+                    continue
+                try:
+                    self._render.submit(self._run_render, *ready)
+                except RuntimeError as e:  # Render havuzu kapatıldı
+                    fut, result, tracer, tmp_dir, t0 = ready[0], ready[7], ready[8], ready[9], ready[10]
+                    result["error"] = str(e)
+                    self._finish(fut, result, tracer, tmp_dir, t0)
+
+    def _acquire_slot(self, seq: int, need: bool, cancel_event) -> bool:
+        """Sırası gelince slot alır (need=False: yalnızca sırayı geçer). İptal edilirse slotsuz False."""
+        with self._slot_cond:
+            while True:
+                cancelled = cancel_event is not None and cancel_event.is_set()
+                if self._slot_seq == seq and (not need or cancelled or self._free_slots > 0):
+                    break
+                self._slot_cond.wait(0.2)
+            self._slot_seq += 1
+            taken = need and not cancelled
+            if taken:
+                self._free_slots -= 1
+            self._slot_cond.notify_all()
+            return taken
+
+    def _release_slot(self) -> None:
+        with self._slot_cond:
+            self._free_slots += 1
+            self._slot_cond.notify_all()
+
+    def _prepare(self, seq, fut, job, channels, log_cb, cancel_event, progress_cb, state_cb):
+        from src.trace import Tracer
+
+        def log(s):
+            if log_cb:
+                log_cb(s)
+
+        t0 = time.perf_counter()
+        result = _new_result(job)
+        try:
+            err = validate_job(job, channels, self.defaults.get("voices"))
+        except Exception as e:
+            err = str(e)
+        if not self._acquire_slot(seq, not err, cancel_event) and not err:
+            err = "İptal edildi."
+        if err:
+            self._handoff(seq, None)
+            result["error"] = err
+            result["seconds"] = round(time.perf_counter() - t0, 3)
+            fut.set_result(result)
+            return
+
+        # Slot alındı: buradan sonraki her hata sırayı (_handoff) ve slotu bırakıp Future'ı sonuçlandırmalı
+        tracer = tmp_dir = None
+        try:
+            tracer = Tracer(self.defaults.get("trace_path") or None, context={"job": job.get("_line")})
+            tmp_dir = tempfile.mkdtemp(prefix="vf_batch_")
+            if state_cb:
+                state_cb("preparing")
+            video_path, comment_segments, err = _prepare_job(job, self.defaults, log, cancel_event, tracer, tmp_dir)
+            if not err and state_cb:
+                state_cb("waiting")
+        except Exception as e:
+            err = str(e) or type(e).__name__
+        if err:
+            self._handoff(seq, None)
+            result["error"] = err
+            self._finish(fut, result, tracer, tmp_dir, t0)
+            return
+        self._handoff(seq, (fut, job, channels, log, cancel_event, progress_cb, state_cb,
+                            result, tracer, tmp_dir, t0, video_path, comment_segments))
+
+    def _run_render(self, fut, job, channels, log, cancel_event, progress_cb, state_cb, result, tracer, tmp_dir, t0,
+                    video_path, comment_segments):
+        try:
+            if state_cb:
+                state_cb("rendering")
+            err = _render_job(job, channels, self.defaults, log, cancel_event, progress_cb, tracer, tmp_dir,
+                              video_path, comment_segments)
+            result["status"] = "failed" if err else "ok"
+            result["error"] = err
+        except Exception as e:
+            result["error"] = str(e)
+        self._finish(fut, result, tracer, tmp_dir, t0)
+
+    def _finish(self, fut, result, tracer, tmp_dir, t0):
+        """Geçici klasörü siler, slotu bırakır, Future'ı sonuçlandırır (tracer/tmp_dir oluşturulamadıysa None)."""
+        try:
+            if tmp_dir:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            if tracer is not None:
+                result["stages"] = tracer.summary()
+        finally:
+            self._release_slot()
+            result["seconds"] = round(time.perf_counter() - t0, 3)
+            fut.set_result(result)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Önce hazırlık havuzu (render'a iş gönderen), sonra render havuzu kapatılır."""
+        self._prep.shutdown(wait=wait)
+        self._render.shutdown(wait=wait)
+
+
+def run_batch(jobs: list, max_jobs: int = 1, defaults: dict = None, log_cb: Optional[Callable[[str], None]] = None,
+              cancel_event: Optional[threading.Event] = None) -> list:
+    """
+    İşleri PipelinedExecutor ile çalıştırır: en fazla max_jobs eşzamanlı render, sıradaki işlerin indirme/TTS'i
+    render sürerken yapılır (defaults: "prep_workers", "lookahead"). Hatalı işler diğerlerini durdurmaz.
+    Sonuçlar iş sırasıyla döner. Log satırları "[iş N]" önekiyle yazılır.
+    cancel_event set edilirse çalışan işler durdurulur, kalanlar "İptal edildi." hatasıyla döner.
+    """
+    defaults = dict(defaults or {})
+    channels = load_channels()
+    settings = load_settings()
+    defaults.setdefault("cookies_file", (settings.get("downloader") or {}).get("cookies_file", ""))
+    defaults.setdefault("offline", bool((settings.get("downloader") or {}).get("offline", False)))
+    lock = threading.Lock()
+
+    def job_log_for(job):
+        def job_log(s):
+            if log_cb:
+                with lock:
+                    log_cb(f"[iş {job.get('_line')}] {s}")
+        return job_log
+
+    def report(job_log):
+        def done(fut):
+            res = fut.result()
+            job_log(("Tamamlandı: " + str(res["out"])) if res["status"] == "ok" else ("Başarısız: " + str(res["error"])))
+        return done
+
+    executor = PipelinedExecutor(
+        defaults, render_workers=max(1, max_jobs),
+        prep_workers=int(defaults.get("prep_workers", DEFAULT_PREP_WORKERS)),
+        lookahead=int(defaults.get("lookahead", DEFAULT_LOOKAHEAD)),
+    )
+    try:
+        futures = []
+        for job in jobs:
+            job_log = job_log_for(job)
+            fut = executor.submit(job, channels, log_cb=job_log, cancel_event=cancel_event)
+            fut.add_done_callback(report(job_log))
+            futures.append(fut)
+        return [f.result() for f in futures]
+    finally:
+        executor.shutdown()
+
+
+def write_summary(results: list, path: str, wall_seconds: float = 0.0) -> dict:
+    """Özet JSON'u yazar ve döndürür. seconds: işlerin toplam süresi, wall_seconds: toplu çalışmanın süresi."""
+    summary = {
+        "total": len(results),
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] != "ok"),
+        "seconds": round(sum(r["seconds"] for r in results), 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "jobs": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""İçerik adresli disk önbelleği: girdi + parametre hash'i -> dosya (+ küçük meta JSON). Boyut sınırı, LRU."""
+import os
+import json
+import shutil
+import hashlib
+import threading
+from typing import Optional
+
+from src.config import get_app_dir, load_settings
+
+CACHE_DIR = "cache"
+DEFAULT_RENDER_CACHE_MB = 2048
+# Önbellek anahtarlarının şema/kod sürümü: ara dosyaların baytlarını değiştiren her kod değişikliğinde
+# (encode argümanları, filtre grafiği, header yerleşimi, TTS çıktı biçimi) artırılır; eski kayıtlar eşleşmez
+CACHE_VERSION = 4
+
+
+def file_digest(path: str) -> str:
+    """Dosya içeriğinin sha256 hash'i (okunamazsa boş string)."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return ""
+    return h.hexdigest()
+
+
+def source_identity(path: str) -> list:
+    """Büyük kaynak videolar için ucuz kimlik: mutlak yol, boyut, mtime."""
+    try:
+        st = os.stat(path)
+        return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [os.path.abspath(path), 0, 0]
+
+
+class ArtifactCache:
+    """
+    Kayıt düzeni: <root>/<key[:2]>/<key>.data + <key>.json (meta; veri yazıldıktan sonra yazılır).
+    Erişimde meta dosyasının mtime'ı güncellenir; toplam boyut max_bytes'ı aşınca en eski kayıtlar silinir.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total = None
+
+    @staticmethod
+    def key(*parts) -> str:
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _paths(self, key: str):
+        d = os.path.join(self.root, key[:2])
+        return os.path.join(d, key + ".data"), os.path.join(d, key + ".json")
+
+    def fetch(self, key: str, dest: str) -> Optional[dict]:
+        """Kayıt varsa dest'e kopyalar ve meta'yı döner; yoksa None."""
+        data, meta_path = self._paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            shutil.copyfile(data, dest)
+            os.utime(meta_path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return meta
+
+    def store(self, key: str, src: str, meta: Optional[dict] = None) -> None:
+        """src dosyasını önbelleğe kopyalar (atomik). Hata önbelleği bozmaz, sessizce yutulur."""
+        data, meta_path = self._paths(key)
+        try:
+            os.makedirs(os.path.dirname(data), exist_ok=True)
+            tmp = "%s.%d.%d.tmp" % (data, os.getpid(), threading.get_ident())
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, data)
+            tmp = "%s.%d.%d.tmp" % (meta_path, os.getpid(), threading.get_ident())
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta or {}, f, ensure_ascii=False)
+            os.replace(tmp, meta_path)
+            size = os.path.getsize(data)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total += size
+            over = self._total is None or self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self) -> list:
+        """[(mtime, boyut, data_yolu, meta_yolu)]"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for e in os.scandir(sub.path):
+                if not e.name.endswith(".json"):
+                    continue
+                data = e.path[:-5] + ".data"
+                try:
+                    entries.append((e.stat().st_mtime, os.path.getsize(data), data, e.path))
+                except OSError:
+                    continue
+        return entries
+
+    def evict(self) -> None:
+        """En az yakın zamanda kullanılan kayıtları toplam boyut max_bytes altına inene kadar siler."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _, _ in entries)
+            for _, size, data, meta_path in entries:
+                if total <= self.max_bytes:
+                    break
+                for p in (meta_path, data):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                total -= size
+            self._total = total
+
+    def stats(self) -> str:
+        return "isabet=%d, ıska=%d" % (self.hits, self.misses)
+
+
+_render_cache = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> ArtifactCache:
+    """Pipeline ara dosyaları için paylaşılan önbellek (<app_dir>/cache/render, settings: cache.render_max_mb)."""
+    global _render_cache
+    with _render_cache_lock:
+        if _render_cache is None:
+            cfg = load_settings().get("cache") or {}
+            max_mb = int(cfg.get("render_max_mb", DEFAULT_RENDER_CACHE_MB))
+            _render_cache = ArtifactCache(os.path.join(get_app_dir(), CACHE_DIR, "render"), max_mb * 1024 * 1024)
+        return _render_cache
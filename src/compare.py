@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Render modu karşılaştırması: aynı girdilerle multi ve single yolunu çalıştırıp süre ve kaliteyi raporlar.
+
+Örnek:
+    python -m src.compare --video video.mp4 --comment_image y1.png --audio y1.mp3 --out_dir karsilastirma
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from src.render import run_pipeline, get_ffmpeg, get_video_info, RENDER_MODES
+from src.tts import get_audio_duration_seconds
+
+
+def _measure(ffmpeg: str, a: str, b: str, metric: str) -> float:
+    """ffmpeg ssim/psnr filtresi ile iki video arasındaki ortalama değeri döndürür (hata: -1)."""
+    cmd = [ffmpeg, "-hide_banner", "-i", a, "-i", b, "-lavfi", f"[0:v][1:v]{metric}", "-f", "null", "-"]
+    try:
+        p = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+    except Exception:
+        return -1.0
+    pattern = r"All:([0-9.]+)" if metric == "ssim" else r"average:([0-9.]+|inf)"
+    m = re.findall(pattern, p.stderr)
+    if not m:
+        return -1.0
+    return float(m[-1]) if m[-1] != "inf" else float("inf")
+
+
+def compare_render_modes(
+    video_path: str,
+    comment_images: list,
+    audio_paths: list,
+    out_dir: str,
+    logo_path: str = "",
+    quality_resolution: str = "1080p",
+    quality_fps: str = "30",
+) -> dict:
+    """Her render modu için duvar saati süresi, dosya boyutu ve süre; ikisi arasında SSIM/PSNR."""
+    os.makedirs(out_dir, exist_ok=True)
+    comment_segments = [{
+        "comment_image_path": img,
+        "tts_audio_path": audio,
+        "tts_duration_sec": get_audio_duration_seconds(audio),
+    } for img, audio in zip(comment_images, audio_paths)]
+
+    report = {"video": video_path, "resolution": quality_resolution, "fps": quality_fps, "modes": {}}
+    outputs = {}
+    for mode in RENDER_MODES:
+        out = os.path.join(out_dir, f"compare_{mode}.mp4")
+        t0 = time.perf_counter()
+        ok = run_pipeline(
+            video_path=video_path,
+            logo_path=logo_path,
+            channel_name="Kanal",
+            username="@kanal",
+            comment_segments=comment_segments,
+            output_path=out,
+            quality_resolution=quality_resolution,
+            quality_fps=quality_fps,
+            render_mode=mode,
+        )
+        wall = time.perf_counter() - t0
+        info = get_video_info(out) if ok else {}
+        report["modes"][mode] = {
+            "ok": bool(ok),
+            "wall_sec": round(wall, 3),
+            "size_bytes": os.path.getsize(out) if ok and os.path.isfile(out) else 0,
+            "duration_sec": info.get("duration", 0),
+        }
+        if ok:
+            outputs[mode] = out
+
+    if len(outputs) == 2:
+        ffmpeg = get_ffmpeg()
+        a, b = outputs["multi"], outputs["single"]
+        report["ssim"] = _measure(ffmpeg, a, b, "ssim")
+        report["psnr"] = _measure(ffmpeg, a, b, "psnr")
+        multi_wall = report["modes"]["multi"]["wall_sec"]
+        single_wall = report["modes"]["single"]["wall_sec"]
+        report["speedup"] = round(multi_wall / single_wall, 2) if single_wall else 0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoShorts - render modu karşılaştırması (multi vs single)")
+    parser.add_argument("--video", required=True, help="Video dosyası (mp4/mov)")
+    parser.add_argument("--comment_image", action="append", required=True, help="Yorum görseli (1-3 kez)")
+    parser.add_argument("--audio", action="append", required=True, help="Yorum sesi (TTS yerine hazır mp3/wav, 1-3 kez)")
+    parser.add_argument("--logo", default="", help="Logo PNG")
+    parser.add_argument("--resolution", default="1080p", choices=("draft", "720p", "1080p"))
+    parser.add_argument("--fps", default="30", choices=("30", "60"))
+    parser.add_argument("--out_dir", default="compare_output", help="Çıktı klasörü")
+    args = parser.parse_args()
+
+    if len(args.comment_image) != len(args.audio) or not 1 <= len(args.audio) <= 3:
+        print("Hata: 1-3 adet --comment_image ve aynı sayıda --audio gerekli.")
+        sys.exit(1)
+
+    report = compare_render_modes(
+        args.video, args.comment_image, args.audio, args.out_dir,
+        logo_path=args.logo, quality_resolution=args.resolution, quality_fps=args.fps,
+    )
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if not all(m["ok"] for m in report["modes"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Uygulama ayarları: kanal profilleri (channels.json) ve settings.json okuma/yazma."""
+import os
+import sys
+import json
+
+
+def get_app_dir():
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+CHANNELS_FILE = "channels.json"
+SETTINGS_FILE = "settings.json"
+
+
+def _channels_path():
+    return os.path.join(get_app_dir(), CHANNELS_FILE)
+
+
+def _settings_path():
+    return os.path.join(get_app_dir(), SETTINGS_FILE)
+
+
+def load_channels():
+    path = _channels_path()
+    if not os.path.isfile(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return []
+
+
+def save_channels(channels):
+    path = _channels_path()
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(channels, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
+
+
+def load_settings():
+    path = _settings_path()
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def save_settings(settings: dict):
+    path = _settings_path()
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, ensure_ascii=False, indent=2)
+    except Exception:
+        pass
@@ -0,0 +1,502 @@
+# -*- coding: utf-8 -*-
+"""TikTok video indirme (yt-dlp) ve kalıcı kaynak kütüphanesi (video id başına video + yt-dlp info JSON)."""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Optional
+
+from src.cache import CACHE_DIR
+from src.config import get_app_dir, load_settings
+from src.render import get_ffmpeg
+
+DEFAULT_LIBRARY_MAX_MB = 4096
+DEFAULT_LIBRARY_MAX_AGE_DAYS = 30
+VIDEO_EXTS = (".mp4", ".webm", ".mov")
+URL_INDEX_FILE = "urls.json"  # url -> video id (id'siz kısa linkler için)
+PINS_DIR = "pins"  # kayıt içinde: kaydı kullanan işlerin klasörleri
+_VIDEO_ID_RE = re.compile(r"/(?:video|photo)/(\d+)")
+
+
+def extract_video_id(url: str) -> Optional[str]:
+    """tiktok.com/@kullanici/video/<id> biçiminden id; kısa linklerde (vm.tiktok.com/...) None."""
+    m = _VIDEO_ID_RE.search(url or "")
+    return m.group(1) if m else None
+
+
+class SourceLibrary:
+    """
+    Kayıt düzeni: <root>/<video_id>/video.<ext> + info.json (yt-dlp bilgisi, sanitize edilmiş),
+    <root>/urls.json (url -> id dizini). Erişimde info.json'un mtime'ı güncellenir. max_age_days'ten uzun
+    süre kullanılmayanlar ve toplam boyut max_bytes'ı aşınca en eski kayıtlar silinir; kullanımda olan
+    (pin'li) kayıtlar atlanır.
+    Pin: <kayıt>/pins/ altında işin klasör yolunu içeren dosya. Klasör var oldukça kayıt silinmez; iş geçici
+    klasörünü silince pin kendiliğinden geçersiz olur (başka süreçlerdeki işler için de geçerli).
+    """
+
+    def __init__(self, root: str, max_bytes: int, max_age_days: float):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_sec = max_age_days * 24 * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._urls = None  # url -> id (urls.json'un bellekteki kopyası)
+        self._urls_mtime = None
+
+    def _video_in(self, entry_dir: str) -> Optional[str]:
+        try:
+            for name in os.listdir(entry_dir):
+                if name.startswith("video.") and name.lower().endswith(VIDEO_EXTS):
+                    return os.path.join(entry_dir, name)
+        except OSError:
+            pass
+        return None
+
+    def _url_index(self) -> dict:
+        """
+        url -> id dizini (kilit altında çağrılır). urls.json başka süreçte değiştiyse yeniden okunur;
+        dosya yoksa (eski kütüphane) info.json'lardan bir kez kurulup yazılır.
+        """
+        path = os.path.join(self.root, URL_INDEX_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._urls is not None and mtime == self._urls_mtime and mtime is not None:
+            return self._urls
+        urls = {}
+        if mtime is not None:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    urls = json.load(f)
+                self._urls, self._urls_mtime = urls, mtime
+                return urls
+            except (OSError, ValueError):
+                urls = {}
+        if os.path.isdir(self.root):
+            for e in os.scandir(self.root):
+                try:
+                    with open(os.path.join(e.path, "info.json"), "r", encoding="utf-8") as f:
+                        info = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                for u in (info.get("original_url"), info.get("webpage_url")):
+                    if u:
+                        urls[u] = e.name
+        self._urls = urls
+        self._save_url_index()
+        return urls
+
+    def _save_url_index(self) -> None:
+        if not os.path.isdir(self.root):
+            return
+        path = os.path.join(self.root, URL_INDEX_FILE)
+        tmp = "%s.%d.%d.tmp" % (path, os.getpid(), threading.get_ident())
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._urls, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._urls_mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._urls_mtime = None
+
+    def _find_by_url(self, url: str) -> Optional[str]:
+        """Id'siz (kısa) linkler: urls.json dizininde original_url / webpage_url ile eşleşen kaydın id'si."""
+        with self._lock:
+            return self._url_index().get(url)
+
+    def pin(self, path: str, holder_dir: str) -> bool:
+        """
+        Kütüphanedeki videoyu (lookup/store yolu) holder_dir var oldukça silinmeyecek şekilde işaretler.
+        Pin'den sonra video hâlâ yerindeyse True (arada başka süreç silmiş olabilir).
+        """
+        entry = os.path.dirname(path)
+        holder = os.path.abspath(holder_dir)
+        pins = os.path.join(entry, PINS_DIR)
+        try:
+            os.makedirs(pins, exist_ok=True)
+            name = hashlib.sha1(holder.encode("utf-8")).hexdigest()[:16]
+            with open(os.path.join(pins, name), "w", encoding="utf-8") as f:
+                f.write(holder)
+        except OSError:
+            return False
+        return os.path.isfile(path)
+
+    @staticmethod
+    def _pinned(entry_dir: str) -> bool:
+        """Klasörü hâlâ var olan bir pin varsa True; klasörü silinmiş (biten işlerin) pin'leri temizlenir."""
+        pinned = False
+        try:
+            pins = list(os.scandir(os.path.join(entry_dir, PINS_DIR)))
+        except OSError:
+            return False
+        for p in pins:
+            try:
+                with open(p.path, "r", encoding="utf-8") as f:
+                    holder = f.read().strip()
+            except OSError:
+                continue
+            if holder and os.path.isdir(holder):
+                pinned = True
+            else:
+                try:
+                    os.remove(p.path)
+                except OSError:
+                    pass
+        return pinned
+
+    def lookup(self, url: str) -> Optional[tuple]:
+        """(video yolu, info) veya None."""
+        video_id = extract_video_id(url) or self._find_by_url(url)
+        entry = os.path.join(self.root, video_id) if video_id else None
+        path = self._video_in(entry) if entry else None
+        info = None
+        if path:
+            try:
+                info_path = os.path.join(entry, "info.json")
+                with open(info_path, "r", encoding="utf-8") as f:
+                    info = json.load(f)
+                os.utime(info_path, None)
+            except (OSError, ValueError):
+                path = None
+        with self._lock:
+            if path:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return (path, info) if path else None
+
+    def store(self, video_id: str, src: str, info: dict, holder_dir: str = None) -> Optional[str]:
+        """
+        İndirilen dosyayı kütüphaneye taşır, info.json'u yanına yazar. Kütüphanedeki yol döner.
+        Hata olursa yarım .tmp dosyaları silinir, video src'ye geri taşınır ve None döner; geri taşıma da
+        başarısız olursa videonun o an bulunduğu yol döner (dosya hiçbir zaman sahipsiz kalmaz).
+        holder_dir verilirse kayıt eviction'dan önce bu klasöre pin'lenir.
+        """
+        entry = os.path.join(self.root, video_id)
+        dest = os.path.join(entry, "video" + os.path.splitext(src)[1].lower())
+        suffix = ".%d.%d.tmp" % (os.getpid(), threading.get_ident())
+        tmp_video = dest + suffix
+        tmp_info = os.path.join(entry, "info.json" + suffix)
+        moved = None  # Video src'den çıktıysa şu an bulunduğu yol
+        try:
+            os.makedirs(entry, exist_ok=True)
+            shutil.move(src, tmp_video)
+            moved = tmp_video
+            os.replace(tmp_video, dest)
+            moved = dest
+            with open(tmp_info, "w", encoding="utf-8") as f:
+                json.dump(info or {}, f, ensure_ascii=False)
+            os.replace(tmp_info, os.path.join(entry, "info.json"))
+        except OSError:
+            # shutil.move yarıda kaldıysa (diskler arası kopya) src hâlâ tam; tmp_video yarım kopyadır
+            for partial in ([tmp_info] if moved else [tmp_info, tmp_video]):
+                try:
+                    os.remove(partial)
+                except OSError:
+                    pass
+            if moved:
+                try:
+                    shutil.move(moved, src)
+                    moved = None
+                except OSError:
+                    pass
+            if moved is None:
+                try:
+                    os.rmdir(entry)  # Yalnızca boşsa; var olan kayıt korunur
+                except OSError:
+                    pass
+            elif holder_dir:
+                self.pin(moved, holder_dir)  # info.json'suz kayıt eviction'da ilk sıradadır
+            return moved
+        with self._lock:
+            urls = self._url_index()
+            for u in ((info or {}).get("original_url"), (info or {}).get("webpage_url")):
+                if u:
+                    urls[u] = video_id
+            self._save_url_index()
+        if holder_dir:
+            self.pin(dest, holder_dir)
+        self.evict(keep=video_id)
+        return dest
+
+    def _entries(self) -> list:
+        """[(son erişim, boyut, kayıt klasörü)]"""
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for e in os.scandir(self.root):
+            if not e.is_dir():
+                continue
+            try:
+                atime = os.stat(os.path.join(e.path, "info.json")).st_mtime
+            except OSError:
+                atime = 0.0  # Yarım kalmış kayıt: ilk silinir
+            size = 0
+            for f in os.scandir(e.path):
+                try:
+                    if f.is_file():
+                        size += f.stat().st_size
+                except OSError:
+                    pass
+            entries.append((atime, size, e.path))
+        return entries
+
+    def evict(self, keep: str = None) -> None:
+        """
+        Süresi dolanları, sonra toplam boyut max_bytes altına inene kadar en eski kayıtları siler.
+        Pin'li (bir işin render ettiği) kayıtlar atlanır; toplam geçici olarak sınırı aşabilir.
+        """
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            cutoff = time.time() - self.max_age_sec
+            removed = set()
+            for atime, size, path in entries:
+                if os.path.basename(path) == keep:
+                    continue
+                if atime >= cutoff and total <= self.max_bytes:
+                    continue
+                if self._pinned(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                removed.add(os.path.basename(path))
+                total -= size
+            if removed:
+                urls = self._url_index()
+                for u in [u for u, vid in urls.items() if vid in removed]:
+                    del urls[u]
+                self._save_url_index()
+
+    def stats(self) -> str:
+        return "isabet=%d, ıska=%d" % (self.hits, self.misses)
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_source_library() -> SourceLibrary:
+    """
+    Paylaşılan kaynak kütüphanesi (<app_dir>/cache/sources). settings.json: downloader.library_max_mb,
+    downloader.library_max_age_days.
+    """
+    global _library
+    with _library_lock:
+        if _library is None:
+            cfg = load_settings().get("downloader") or {}
+            _library = SourceLibrary(
+                os.path.join(get_app_dir(), CACHE_DIR, "sources"),
+                int(cfg.get("library_max_mb", DEFAULT_LIBRARY_MAX_MB)) * 1024 * 1024,
+                float(cfg.get("library_max_age_days", DEFAULT_LIBRARY_MAX_AGE_DAYS)),
+            )
+        return _library
+
+
+def download_tiktok_video(
+    url: str,
+    out_dir: str,
+    cookies_file: str = "",
+    log_cb=None,
+    use_library: bool = True,
+    offline: bool = False,
+    record: Optional[dict] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> str:
+    """
+    yt-dlp ile TikTok URL'den video indirir. Video yolunu döner, hata durumunda None.
+    use_library: önce kaynak kütüphanesine bakılır (isabette ağa gidilmez, kütüphanedeki yol döner);
+    indirilen video kütüphaneye taşınır. Dönen kütüphane kaydı out_dir var oldukça silinmez (pin); çağıran
+    işin sonunda out_dir'i siler. offline: yalnızca kütüphane, indirme yok.
+    record: trace kaydı; cache_hit ve video_id yazılır.
+    cancel_event: set edilirse indirme (yt-dlp ilerleme kancasında) kesilir, None döner.
+    """
+    def log(s):
+        if log_cb:
+            log_cb(s)
+
+    library = get_source_library() if use_library else None
+    if library:
+        hit = library.lookup(url)
+        if record is not None:
+            record["cache_hit"] = hit is not None
+        if hit and not library.pin(hit[0], out_dir):
+            hit = None  # Pin sırasında başka süreç kaydı sildi: yeniden indir
+            if record is not None:
+                record["cache_hit"] = False
+        if hit:
+            path, info = hit
+            if record is not None:
+                record["video_id"] = info.get("id")
+            log("Kaynak kütüphaneden: %s (%.1f MB, %s)" % (
+                info.get("id") or os.path.basename(os.path.dirname(path)), os.path.getsize(path) / 1048576.0, library.stats()))
+            return path
+    if offline:
+        log("Çevrimdışı mod: video kaynak kütüphanesinde yok: " + url)
+        return None
+
+    try:
+        import yt_dlp
+    except ImportError:
+        if log_cb:
+            log_cb("yt-dlp yüklü değil. pip install yt-dlp")
+        return None
+    if cancel_event is not None and cancel_event.is_set():
+        return None
+    
+    # Chrome açık mı kontrol et (Windows)
+    chrome_running = False
+    if sys.platform == "win32":
+        try:
+            import subprocess
+            result = subprocess.run(["tasklist", "/FI", "IMAGENAME eq chrome.exe"], 
+                                 capture_output=True, text=True, timeout=2)
+            chrome_running = "chrome.exe" in result.stdout
+        except Exception:
+            pass
+    
+    out_tmpl = os.path.join(out_dir, "tiktok_dl.%(ext)s")
+    opts = {
+        "outtmpl": out_tmpl,
+        # TikTok: HEVC + sessiz video yerine, AVC + m4a ses tercih et
+        # Örnek: bv*[vcodec^=avc]+ba[ext=m4a]/b[ext=mp4]/b
+        "format": "bv*[vcodec^=avc]+ba[ext=m4a]/b[ext=mp4]/b",
+        "quiet": False,  # Hata mesajlarını görmek için False
+        "no_warnings": False,
+        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "referer": "https://www.tiktok.com/",
+        "extractor_args": {
+            "tiktok": {
+                "webpage_download": True,
+            }
+        },
+    }
+    if cancel_event is not None:
+        cancelled_exc = getattr(yt_dlp.utils, "DownloadCancelled", Exception)
+
+        def cancel_hook(_status):
+            # yt-dlp her veri parçasında çağırır; istisna indirmeyi keser
+            if cancel_event.is_set():
+                raise cancelled_exc("İptal edildi.")
+        opts["progress_hooks"] = [cancel_hook]
+
+    # yt-dlp'nin, uygulama ile gelen ffmpeg'i kullanabilmesi için
+    try:
+        ffmpeg_bin = get_ffmpeg()
+        # get_ffmpeg tam yol döndürüyor ise dizinini ver
+        if os.path.isabs(ffmpeg_bin):
+            opts["ffmpeg_location"] = os.path.dirname(ffmpeg_bin)
+    except Exception:
+        pass
+    
+    # Öncelik: cookies.txt varsa onu kullan
+    if cookies_file and os.path.isfile(cookies_file):
+        if log_cb:
+            log_cb(f"Cookies.txt kullanılıyor: {cookies_file}")
+        # Cookies.txt formatını kontrol et ve gerekirse dönüştür
+        try:
+            with open(cookies_file, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+                # JSON formatında mı kontrol et
+                if content.startswith("[") or content.startswith("{"):
+                    if log_cb:
+                        log_cb("JSON formatı tespit edildi, Netscape formatına dönüştürülüyor...")
+                    # JSON'u Netscape formatına dönüştür
+                    try:
+                        cookies_json = json.loads(content)
+                        # Liste değilse liste yap
+                        if isinstance(cookies_json, dict):
+                            cookies_json = [cookies_json]
+                        elif not isinstance(cookies_json, list):
+                            cookies_json = []
+                        # Geçici Netscape format dosyası oluştur
+                        netscape_file = os.path.join(out_dir, "cookies_netscape.txt")
+                        with open(netscape_file, "w", encoding="utf-8") as nf:
+                            nf.write("# Netscape HTTP Cookie File\n")
+                            nf.write("# This file was generated from JSON format\n\n")
+                            for cookie in cookies_json:
+                                domain = cookie.get("domain", "").strip()
+                                if not domain:
+                                    continue
+                                # Netscape format: domain, includeSubdomains, path, secure, expiration, name, value
+                                include_sub = "TRUE" if domain.startswith(".") else "FALSE"
+                                path = cookie.get("path", "/")
+                                secure = "TRUE" if cookie.get("secure", False) else "FALSE"
+                                exp = int(cookie.get("expirationDate", 0)) if cookie.get("expirationDate") else 0
+                                name = cookie.get("name", "")
+                                value = cookie.get("value", "")
+                                if name and value:
+                                    nf.write(f"{domain}\t{include_sub}\t{path}\t{secure}\t{exp}\t{name}\t{value}\n")
+                        opts["cookiefile"] = netscape_file
+                        if log_cb:
+                            log_cb(f"Netscape formatına dönüştürüldü: {netscape_file}")
+                    except Exception as e:
+                        if log_cb:
+                            log_cb(f"JSON dönüştürme hatası: {e}")
+                        opts["cookiefile"] = cookies_file
+                else:
+                    # Zaten Netscape formatı
+                    if "tiktok.com" in content.lower() or "sessionid" in content.lower():
+                        if log_cb:
+                            log_cb("Cookies.txt TikTok cookie'leri içeriyor.")
+                    opts["cookiefile"] = cookies_file
+        except Exception as e:
+            if log_cb:
+                log_cb(f"Cookies.txt okunamadı: {e}")
+            opts["cookiefile"] = cookies_file
+    elif not chrome_running:
+        # Chrome kapalı, cookie'leri çekebiliriz
+        if log_cb:
+            log_cb("Chrome'dan cookie çekiliyor...")
+        opts["cookiesfrombrowser"] = ("chrome",)
+    else:
+        # Chrome açık ve cookies.txt yok
+        if log_cb:
+            log_cb("UYARI: Chrome açık ve cookies.txt yok. Cookie olmadan deneniyor...")
+    
+    # TikTok için ekstra ayarlar
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            if log_cb:
+                log_cb(f"İndirme başlatılıyor: {url}")
+            info = ydl.sanitize_info(ydl.extract_info(url, download=True)) or {}
+        # İndirilen dosyayı bul
+        for f in os.listdir(out_dir):
+            if f.startswith("tiktok_dl.") and f.lower().endswith(VIDEO_EXTS):
+                path = os.path.join(out_dir, f)
+                if log_cb:
+                    log_cb(f"İndirme tamamlandı: {path}")
+                video_id = info.get("id") or extract_video_id(url)
+                if record is not None:
+                    record["video_id"] = video_id
+                if library and video_id:
+                    info.setdefault("original_url", url)
+                    stored = library.store(video_id, path, info, holder_dir=out_dir)
+                    if stored:
+                        log("Kaynak kütüphanesine eklendi: %s (%s)" % (video_id, library.stats()))
+                        return stored
+                return path
+        if log_cb:
+            log_cb("HATA: İndirilen dosya bulunamadı.")
+        return None
+    except Exception as e:
+        if cancel_event is not None and cancel_event.is_set():
+            log("İndirme iptal edildi.")
+            return None
+        err_msg = str(e)
+        if log_cb:
+            log_cb(f"İndirme hatası: {err_msg}")
+            # TikTok özel hatalar
+            if "sign in" in err_msg.lower() or "login" in err_msg.lower():
+                log_cb("TikTok giriş gerektiriyor. cookies.txt dosyanızı kontrol edin.")
+                log_cb("Cookies.txt'de 'sessionid' cookie'si olmalı.")
+            elif "cookie" in err_msg.lower():
+                log_cb("Cookie hatası. cookies.txt formatını kontrol edin (Netscape formatı).")
+            elif "unavailable" in err_msg.lower() or "private" in err_msg.lower():
+                log_cb("Video erişilemez veya özel. Giriş yapmış cookies.txt kullanın.")
+        return None
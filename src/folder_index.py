@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Otomatik görsel/video seçimi için artımlı klasör indeksi: en yeni N dosya ve toplam sayı, tam tarama olmadan."""
+import os
+import time
+import heapq
+import threading
+from typing import Optional
+
+DEFAULT_TOP_N = 16
+MTIME_GRANULARITY_SEC = 2.0  # FAT/SMB klasör mtime çözünürlüğü: aynı aralıktaki değişiklik mtime'ı değiştirmeyebilir
+
+
+class FolderIndex:
+    """
+    Klasördeki uzantısı uyan dosyaların ad -> mtime tablosu ve mtime'a göre en yeni top_n listesi (bellekte).
+    Değişiklik algılama: watchdog yüklüyse dosya olayları tabloya doğrudan işlenir (tarama yok, top_n listesi
+    yerinde güncellenir; yalnızca listedeki bir dosya silinince/eskiyince tablodan yeniden kurulur); değilse veya
+    izleme başlatılamazsa klasörün mtime'ı yoklanır. Klasör mtime'ı değişince yalnızca liste okunur, yalnızca
+    yeni adlar için stat yapılır. Yerinde üzerine yazılan dosyalar (klasör mtime'ı değişmez) yoklamada görülmez.
+    """
+
+    def __init__(self, folder: str, exts: tuple, top_n: int = DEFAULT_TOP_N, use_watchdog: bool = True):
+        self.folder = folder
+        self.exts = tuple(e.lower() for e in exts)
+        self.top_n = max(1, top_n)
+        self._files = {}  # ad -> mtime
+        self._top = []  # [(mtime, ad)] min-heap: en eskisi _top[0]
+        self._top_names = set()
+        self._dir_mtime = None
+        self._scanned_at = 0.0  # Son taramanın (duvar saati) zamanı
+        self._dirty = True
+        self._lock = threading.Lock()
+        self._observer = self._start_watchdog() if use_watchdog else None
+
+    def _match(self, name: str) -> bool:
+        return name.lower().endswith(self.exts)
+
+    def _start_watchdog(self):
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+        index = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if not event.is_directory:
+                    index._on_event(event.event_type, event.src_path, getattr(event, "dest_path", ""))
+
+        try:
+            observer = Observer()
+            observer.schedule(Handler(), self.folder, recursive=False)
+            observer.daemon = True
+            observer.start()
+        except Exception:
+            return None
+        return observer
+
+    def _on_event(self, kind: str, src: str, dest: str) -> None:
+        """watchdog olayı: created/modified -> stat, deleted -> sil, moved -> eski adı sil, yeni adı ekle."""
+        with self._lock:
+            if self._dirty:
+                return  # İlk tarama henüz yapılmadı; tarama bu değişikliği de görecek
+            rebuild = False
+            if kind in ("deleted", "moved"):
+                name = os.path.basename(src)
+                if self._files.pop(name, None) is not None and name in self._top_names:
+                    rebuild = True  # Yerine geçecek dosya yalnızca tam tabloda bulunur
+            path = dest if kind == "moved" else src
+            if kind in ("created", "modified", "moved") and \
+                    os.path.normcase(os.path.dirname(path)) == os.path.normcase(self.folder):
+                name = os.path.basename(path)
+                if self._match(name):
+                    try:
+                        mtime = os.stat(path).st_mtime
+                    except OSError:
+                        mtime = None
+                    if mtime is not None:
+                        old = self._files.get(name)
+                        self._files[name] = mtime
+                        if not rebuild and not self._update_top(name, old, mtime):
+                            rebuild = True
+            if rebuild:
+                self._rebuild_top()
+
+    def _update_top(self, name: str, old: Optional[float], mtime: float) -> bool:
+        """top_n'i tek dosya için günceller (dosya sayısından bağımsız). Tam yeniden kurma gerekiyorsa False."""
+        if name in self._top_names:
+            if old is None or mtime < old:
+                return False  # Listeden düşebilir; yerini alacak dosya bilinmiyor
+            self._top[self._top.index((old, name))] = (mtime, name)
+            heapq.heapify(self._top)  # top_n öğe
+            return True
+        item = (mtime, name)
+        if len(self._top) < self.top_n:
+            heapq.heappush(self._top, item)
+        elif item > self._top[0]:
+            self._top_names.discard(heapq.heapreplace(self._top, item)[1])
+        else:
+            return True
+        self._top_names.add(name)
+        return True
+
+    def _rebuild_top(self) -> None:
+        self._top = heapq.nlargest(self.top_n, ((m, n) for n, m in self._files.items()))
+        heapq.heapify(self._top)
+        self._top_names = {n for _, n in self._top}
+
+    def _scan(self) -> None:
+        """Listeyi okur; bilinen adların mtime'ı korunur, yalnızca yeni adlar stat edilir, silinenler çıkarılır."""
+        files = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not self._match(entry.name):
+                        continue
+                    known = self._files.get(entry.name)
+                    if known is not None:
+                        files[entry.name] = known
+                        continue
+                    try:
+                        if entry.is_file():
+                            files[entry.name] = entry.stat().st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            files = {}
+        self._files = files
+        self._rebuild_top()
+        self._scanned_at = time.time()
+
+    def refresh(self) -> None:
+        """
+        İzleme yoksa klasör mtime'ı değiştiyse artımlı tarama; izleme varsa yalnızca ilk taramayı yapar.
+        Son tarama klasör mtime'ının çözünürlük aralığı içinde yapıldıysa (aynı aralıktaki sonraki bir değişiklik
+        mtime'ı değiştirmemiş olabilir) aralık başına en fazla bir kez daha taranır.
+        """
+        with self._lock:
+            if self._observer is not None and not self._dirty:
+                return
+            try:
+                dir_mtime = os.stat(self.folder).st_mtime_ns
+            except OSError:
+                self._files, self._top, self._top_names, self._dir_mtime = {}, [], set(), None
+                return
+            now = time.time()
+            stale = self._scanned_at < dir_mtime / 1e9 + MTIME_GRANULARITY_SEC and \
+                now - self._scanned_at >= MTIME_GRANULARITY_SEC
+            if self._dirty or stale or dir_mtime != self._dir_mtime:
+                self._scan()
+                self._dir_mtime = dir_mtime
+                self._dirty = False
+
+    def newest(self, n: int) -> list:
+        """En yeni n dosyanın tam yolu (en yeni önce). n <= top_n ise bellekteki listeden, tarama yok."""
+        self.refresh()
+        with self._lock:
+            source = self._top if n <= self.top_n else ((m, k) for k, m in self._files.items())
+            return [os.path.join(self.folder, name) for _, name in heapq.nlargest(n, source)]
+
+    def count(self) -> int:
+        self.refresh()
+        with self._lock:
+            return len(self._files)
+
+    def close(self) -> None:
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+            except Exception:
+                pass
+            self._observer = None
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_folder_index(folder: str, exts: tuple) -> Optional[FolderIndex]:
+    """Klasör + uzantılar başına paylaşılan indeks; klasör yoksa None."""
+    if not folder or not os.path.isdir(folder):
+        return None
+    folder = os.path.abspath(folder)
+    key = (os.path.normcase(folder), tuple(e.lower() for e in exts))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = FolderIndex(folder, key[1])
+        return index
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Thread-safe log kuyruğu: render thread'leri yazar, GUI zamanlayıcıyla toplu boşaltır; isteğe bağlı dosya kopyası."""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from src.config import get_app_dir
+
+LOGS_DIR = "logs"
+DEFAULT_MAX_LINES = 2000
+DEFAULT_FILE_MAX_MB = 5
+DEFAULT_FILE_BACKUPS = 3
+
+
+class LogSink:
+    """
+    write() her thread'den çağrılabilir; satırlar kuyruğa eklenir ve (açıksa) iş log dosyasına yazılır.
+    Kuyruk max_lines satırlık halka tampondur: GUI yetişemezse en eski satırlar atılır ve sayılır (dropped).
+    drain() kuyruktaki satırları en fazla max_items kadar toplu döner (GUI thread'inden çağrılır); son
+    boşaltmadan beri satır atıldıysa başa "... N satır atlandı" satırı eklenir. Dosya kopyası kırpılmaz.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        self.max_lines = max(100, int(max_lines))
+        self._queue = deque(maxlen=self.max_lines)
+        self._lock = threading.Lock()
+        self._file_logger = None
+        self._handler = None
+        self.dropped = 0  # Toplam atılan satır
+        self._dropped_pending = 0  # Son drain'den beri atılan
+
+    def write(self, msg: str) -> None:
+        with self._lock:
+            if len(self._queue) == self.max_lines:
+                self.dropped += 1
+                self._dropped_pending += 1
+            self._queue.append(msg)
+            if self._file_logger:
+                self._file_logger.info(msg)
+
+    def drain(self, max_items: int = 500) -> list:
+        with self._lock:
+            lines = [self._queue.popleft() for _ in range(min(max_items, len(self._queue)))]
+            dropped, self._dropped_pending = self._dropped_pending, 0
+        if dropped:
+            lines.insert(0, "... %d satır atlandı (log kuyruğu dolu; tamamı için log dosyası açılabilir)" % dropped)
+        return lines
+
+    def open_job_file(self, name: str, max_mb: float = DEFAULT_FILE_MAX_MB,
+                      backups: int = DEFAULT_FILE_BACKUPS) -> Optional[str]:
+        """<app_dir>/logs/<name>_<zaman>.log dosyasını açar (boyut sınırında döner). Yol veya hata olursa None."""
+        self.close_job_file()
+        log_dir = os.path.join(get_app_dir(), LOGS_DIR)
+        path = os.path.join(log_dir, "%s_%s.log" % (name, time.strftime("%Y%m%d_%H%M%S")))
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+            handler = RotatingFileHandler(path, maxBytes=int(max_mb * 1024 * 1024), backupCount=backups, encoding="utf-8")
+        except OSError:
+            return None
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger = logging.getLogger("autoshorts.job.%d" % id(self))
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        with self._lock:
+            self._file_logger, self._handler = logger, handler
+        return path
+
+    def close_job_file(self) -> None:
+        with self._lock:
+            logger, handler = self._file_logger, self._handler
+            self._file_logger = self._handler = None
+        if handler:
+            logger.removeHandler(handler)
+            handler.close()
@@ -5,21 +5,102 @@ import sys
 import argparse
 
 
+def _install_cancel_handler():
+    """
+    Ctrl+C: ilk basışta iptal event'i set edilir (çalışan ffmpeg süreç grupları öldürülür, geçici dosyalar
+    silinir, yeni aşama başlatılmaz); ikinci basışta doğrudan çıkılır.
+    """
+    import signal
+    import threading
+    cancel_event = threading.Event()
+
+    def handler(signum, frame):
+        if cancel_event.is_set():
+            raise KeyboardInterrupt
+        cancel_event.set()
+        print("İptal ediliyor... (hemen çıkmak için tekrar Ctrl+C)")
+    signal.signal(signal.SIGINT, handler)
+    return cancel_event
+
+
+def _batch(args):
+    import time
+    from src.batch import load_jobs, run_batch, write_summary
+
+    if not os.path.isfile(args.batch):
+        print("Hata: İş dosyası bulunamadı:", args.batch)
+        sys.exit(1)
+    jobs = load_jobs(args.batch)
+    if not jobs:
+        print("Hata: İş dosyasında iş yok:", args.batch)
+        sys.exit(1)
+
+    from src.voices import get_voices, validate_voice
+    voices = get_voices(max_age=float("inf"))
+    if validate_voice(args.voice, voices) is False:
+        print("Hata: Bilinmeyen TTS sesi:", args.voice)
+        sys.exit(1)
+
+    defaults = {
+        "voices": voices,
+        "voice": args.voice,
+        "render_mode": args.render_mode,
+        "max_workers": max(1, args.max_workers),
+        "use_cache": not args.no_cache,
+        "trace_path": args.trace,
+        "lookahead": max(0, args.lookahead),
+    }
+    if args.offline:
+        defaults["offline"] = True  # Yoksa settings.json → downloader.offline
+    cancel_event = _install_cancel_handler()
+    t0 = time.perf_counter()
+    results = run_batch(jobs, max_jobs=max(1, args.batch_workers), defaults=defaults, log_cb=print,
+                        cancel_event=cancel_event)
+    summary_path = args.summary or os.path.splitext(args.batch)[0] + ".summary.json"
+    summary = write_summary(results, summary_path, wall_seconds=time.perf_counter() - t0)
+
+    print()
+    print("Özet: %d iş, %d başarılı, %d başarısız, %.1f sn" % (
+        summary["total"], summary["ok"], summary["failed"], summary["wall_seconds"]))
+    for r in results:
+        status = "OK  " if r["status"] == "ok" else "HATA"
+        print("  [%s] satır %s  %6.1f sn  %s%s" % (
+            status, r["line"], r["seconds"], r["out"] or "-", "" if r["status"] == "ok" else "  (" + str(r["error"]) + ")"))
+    print("Özet dosyası:", summary_path)
+    if summary["failed"]:
+        sys.exit(1)
+
+
 def _cli():
     parser = argparse.ArgumentParser(description="AutoShorts - Repost overlay + TTS")
-    parser.add_argument("--video", required=True, help="Video dosyası (mp4/mov)")
+    parser.add_argument("--video", help="Video dosyası (mp4/mov)")
     parser.add_argument("--logo", default="", help="Logo PNG")
     parser.add_argument("--channel_name", default="", help="Kanal adı")
     parser.add_argument("--username", default="", help="Kullanıcı adı")
-    parser.add_argument("--comment_image", required=True, help="Yorum görseli (png/jpg)")
-    parser.add_argument("--comment_text", required=True, help="Yorum metni (TTS okunacak)")
-    parser.add_argument("--out", required=True, help="Çıktı MP4 yolu (1080x1920, 30fps)")
+    parser.add_argument("--comment_image", help="Yorum görseli (png/jpg)")
+    parser.add_argument("--comment_text", help="Yorum metni (TTS okunacak)")
+    parser.add_argument("--out", help="Çıktı MP4 yolu (1080x1920, 30fps)")
     parser.add_argument("--voice", default="tr-TR-AhmetNeural", help="TTS sesi (tr-TR-...)")
+    parser.add_argument("--resolution", default="1080p", choices=("draft", "720p", "1080p"),
+                        help="Kalite profili; draft: 360p ultrafast, TASLAK etiketli hızlı önizleme")
+    parser.add_argument("--render_mode", default="multi", choices=("multi", "single"),
+                        help="multi: segment başına ayrı ffmpeg + concat, single: tek filter_complex (tek encode)")
+    parser.add_argument("--max_workers", type=int, default=1, help="Eşzamanlı ffmpeg işi sayısı (multi mod, varsayılan 1)")
+    parser.add_argument("--no_cache", action="store_true", help="Ara dosya ve TTS önbelleğini kullanma (her aşamayı yeniden üret)")
+    parser.add_argument("--batch", default="", help="Toplu render: JSONL iş dosyası (her satır bir short)")
+    parser.add_argument("--batch_workers", type=int, default=1, help="Toplu modda eşzamanlı render sayısı (varsayılan 1)")
+    parser.add_argument("--lookahead", type=int, default=2, help="Toplu mod: render beklerken önceden hazırlanan (indirme + TTS) en fazla iş")
+    parser.add_argument("--summary", default="", help="Toplu mod özet JSON yolu (varsayılan: <iş dosyası>.summary.json)")
+    parser.add_argument("--offline", action="store_true", help="Toplu mod: TikTok videolarını indirme, yalnızca kaynak kütüphanesini kullan")
+    parser.add_argument("--trace", default="", help="Aşama ölçümlerini (süre, CPU, boyut, ffmpeg argv) bu JSONL dosyasına ekle")
     args = parser.parse_args()
 
-    from src.tts import generate_tts
-    from src.render import run_pipeline
-    import tempfile
+    if args.batch:
+        _batch(args)
+        return
+    missing = [name for name in ("video", "comment_image", "comment_text", "out") if not getattr(args, name)]
+    if missing:
+        parser.error("şu argümanlar gerekli: " + ", ".join("--" + m for m in missing))
 
     if not os.path.isfile(args.video):
         print("Hata: Video dosyası bulunamadı:", args.video)
@@ -28,13 +109,33 @@ def _cli():
         print("Hata: Yorum görseli bulunamadı:", args.comment_image)
         sys.exit(1)
 
+    from src.voices import validate_voice
+    if validate_voice(args.voice) is False:
+        print("Hata: Bilinmeyen TTS sesi:", args.voice)
+        sys.exit(1)
+
+    # Ağır modüller doğrulamadan sonra (başlangıç bütçesi: benchmarks/startup_bench.py)
+    from src.tts import generate_tts_many
+    from src.render import run_pipeline
+    from src.trace import Tracer
+    import tempfile
+
     def log(s):
         print(s)
 
+    cancel_event = _install_cancel_handler()
+    tracer = Tracer(args.trace or None)
     tmp = tempfile.mkdtemp(prefix="vf_cli_")
     tts_path = os.path.join(tmp, "tts.mp3")
     try:
-        duration_sec = generate_tts(args.comment_text, args.voice, tts_path)
+        with tracer.stage("tts", outputs=[tts_path]):
+            _, duration_sec = generate_tts_many(
+                [(args.comment_text, args.voice, tts_path)], use_cache=not args.no_cache, log_cb=log,
+                cancel_event=cancel_event,
+            )[0]
+        if cancel_event.is_set():
+            print("İptal edildi.")
+            sys.exit(130)
         if duration_sec <= 0:
             print("Hata: TTS üretilemedi veya süre alınamadı.")
             sys.exit(1)
@@ -56,11 +157,20 @@ def _cli():
             comment_segments=comment_segments,
             output_path=args.out,
             log_cb=log,
+            quality_resolution=args.resolution,
+            render_mode=args.render_mode,
+            max_workers=max(1, args.max_workers),
+            use_cache=not args.no_cache,
+            cancel_event=cancel_event,
+            tracer=tracer,
         )
+        if args.trace:
+            print("Aşamalar: " + ", ".join("%s=%.2fs" % kv for kv in ok.stage_seconds().items()))
+            print("Trace:", args.trace)
         if ok:
             print("Tamamlandı:", args.out)
         else:
-            sys.exit(1)
+            sys.exit(130 if cancel_event.is_set() else 1)
     finally:
         import shutil
         shutil.rmtree(tmp, ignore_errors=True)
@@ -2,18 +2,31 @@
 """FFmpeg tabanlı video pipeline: intro + header bar + yorum overlay, concat."""
 import os
 import sys
+import json
+import math
 import subprocess
 import tempfile
 import shutil
+import signal
+import threading
+import time
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional, Callable
 
 from src.tts import get_audio_duration_seconds
+from src.cache import ArtifactCache, CACHE_DIR, CACHE_VERSION, get_render_cache, file_digest, source_identity
+from src.trace import Tracer, record_command
 
-# PIL header görseli için
-try:
-    from PIL import Image, ImageDraw, ImageFont
-except ImportError:
-    Image = ImageDraw = ImageFont = None
+
+def _pil():
+    """Pillow ilk header görselinde yüklenir (import src.render, CLI doğrulaması ve --help Pillow'suz kalır)."""
+    try:
+        from PIL import Image, ImageDraw, ImageFont
+    except ImportError:
+        raise RuntimeError("Pillow (PIL) yüklü değil. pip install Pillow")
+    return Image, ImageDraw, ImageFont
 
 
 def get_app_dir():
@@ -48,73 +61,318 @@ def get_ffprobe():
     return "ffprobe"
 
 
-def _run(cmd: list, log_cb: Optional[Callable[[str], None]] = None, timeout: Optional[int] = None):
+# ffmpeg -progress çıktısındaki anahtarlar (log'a yazılmaz)
+_PROGRESS_KEYS = {
+    "frame", "fps", "bitrate", "total_size", "out_time_us", "out_time_ms", "out_time",
+    "dup_frames", "drop_frames", "speed", "progress",
+}
+
+
+# _run dönüş kodları: süreç bizim tarafımızdan öldürüldü
+RC_CANCELLED = -1001
+RC_TIMEOUT = -1002
+
+
+def _parse_progress_value(v: str) -> Optional[float]:
+    try:
+        return float(v.strip().rstrip("x"))
+    except ValueError:
+        return None  # "N/A"
+
+
+class CancelEvent(threading.Event):
+    """Kendisi veya parent event'i set edildiğinde set sayılır (pipeline içi fail-fast + dışarıdan iptal)."""
+
+    def __init__(self, parent: Optional[threading.Event] = None):
+        super().__init__()
+        self._parent = parent
+
+    def is_set(self) -> bool:
+        return super().is_set() or bool(self._parent is not None and self._parent.is_set())
+
+
+def _kill_process_tree(p: subprocess.Popen) -> None:
+    """Süreci ve kendi süreç grubundaki alt süreçleri sonlandırır."""
+    try:
+        if sys.platform == "win32":
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(p.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+        else:
+            os.killpg(p.pid, signal.SIGKILL)
+    except Exception:
+        pass
+    try:
+        p.kill()
+    except Exception:
+        pass
+
+
+def _exit_code(status: int) -> int:
+    """wait durumunu çıkış koduna çevirir (sinyalle bitmişse -sinyal). os.waitstatus_to_exitcode 3.9+ olduğundan elle."""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return status
+
+
+def _reap_child(p: subprocess.Popen, block: bool) -> Optional[int]:
+    """
+    Süreç bittiyse çıkış kodunu döner (block=True ise bitmesini bekler, değilse bitmemişse None).
+    wait4 olan sistemlerde alt sürecin kaynak kullanımı (CPU, tepe RSS) p.rusage'a yazılır.
+    """
+    if hasattr(os, "wait4") and p.returncode is None:
+        try:
+            pid, status, rusage = os.wait4(p.pid, 0 if block else os.WNOHANG)
+            if pid:
+                p.rusage = rusage
+                p.returncode = _exit_code(status)
+        except ChildProcessError:
+            pass
+    return p.wait() if block else p.poll()
+
+
+def _wait_child(p: subprocess.Popen) -> int:
+    """Süreci bekler (bkz. _reap_child)."""
+    return _reap_child(p, True)
+
+
+def _run(cmd: list, log_cb: Optional[Callable[[str], None]] = None, timeout: Optional[int] = None,
+         progress_cb: Optional[Callable[[dict], None]] = None, cancel_event: Optional[threading.Event] = None):
+    """
+    Komutu kendi süreç grubunda çalıştırır, çıkış kodunu döner. ffmpeg komutlarına -progress pipe:1 -nostats
+    -loglevel warning eklenir: istatistik satırları log'a gitmez, her blokta progress_cb({"out_time", "fps",
+    "speed"}) çağrılır. timeout (sn) aşılırsa veya cancel_event set edilirse süreç grubu öldürülür
+    (RC_TIMEOUT / RC_CANCELLED döner).
+    """
+    if cancel_event is not None and cancel_event.is_set():
+        return RC_CANCELLED
+    if os.path.basename(cmd[0]).lower().startswith("ffmpeg"):
+        cmd = [cmd[0], "-hide_banner", "-nostats", "-loglevel", "warning", "-progress", "pipe:1"] + cmd[1:]
     if log_cb:
         log_cb(" ".join(cmd))
+    entry = record_command(cmd)
+    t_start = time.perf_counter()
+    kwargs = {}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
     p = subprocess.Popen(
         cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
+        encoding="utf-8",
+        errors="replace",  # UTF-8 olmayan dosya adı / uyarı baytları okuyucuyu düşürmesin
         bufsize=1,
+        **kwargs,
     )
-    out_lines = []
-    for line in iter(p.stdout.readline, ""):
-        out_lines.append(line)
-        if log_cb:
-            log_cb(line.rstrip())
-    p.wait()
-    if p.returncode != 0 and log_cb:
-        log_cb(f"[HATA] Çıkış kodu: {p.returncode}")
+
+    def safe_call(cb, arg):
+        # Geri çağırma hatası okuyucuyu durdurmamalı: boru boşaltılmazsa ffmpeg dolu pipe'ta bloklanır
+        try:
+            cb(arg)
+        except Exception:
+            pass
+
+    def read_output():
+        stats = {}
+        try:
+            for line in iter(p.stdout.readline, ""):
+                key, sep, value = line.strip().partition("=")
+                if sep and (key in _PROGRESS_KEYS or key.startswith("stream_")):
+                    stats[key] = value
+                    if key == "progress" and progress_cb:
+                        # out_time_ms adına rağmen mikrosaniyedir; yeni sürümler out_time_us da yazar
+                        us = _parse_progress_value(stats.get("out_time_us") or stats.get("out_time_ms") or "")
+                        safe_call(progress_cb, {
+                            "out_time": (us or 0.0) / 1e6,
+                            "fps": _parse_progress_value(stats.get("fps", "")),
+                            "speed": _parse_progress_value(stats.get("speed", "")),
+                        })
+                    if key == "progress":
+                        stats = {}
+                    continue
+                if log_cb:
+                    safe_call(log_cb, line.rstrip())
+        except (OSError, ValueError):
+            pass  # Pipe süreç öldürülürken / kapatılırken kapandı
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    killed = None
+    # Çıktı kapanana ve süreç bitene kadar bekle; arada iptal ve zaman aşımı kontrol edilir. Süreç de
+    # yoklanır: okuyucu beklenmedik şekilde dursa bile zaman aşımı ve iptal uygulanır.
+    while True:
+        reader.join(timeout=0.2)
+        if _reap_child(p, False) is not None:
+            # Süreç bitti; çıktının geri kalanı için kısa süre tanınır (pipe'ı tutan alt süreç olabilir)
+            reader.join(timeout=5)
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            killed = RC_CANCELLED
+        elif deadline is not None and time.monotonic() > deadline:
+            killed = RC_TIMEOUT
+            if log_cb:
+                safe_call(log_cb, f"[HATA] Zaman aşımı ({timeout} sn), süreç sonlandırıldı.")
+        if killed:
+            _kill_process_tree(p)
+            reader.join(timeout=5)
+            break
+        if not reader.is_alive():
+            time.sleep(0.05)  # Çıktı kapandı (join hemen döner); sürecin çıkması beklenir
+    rc = _wait_child(p)
+    p.stdout.close()
+    if entry is not None:
+        entry["rc"] = rc
+        entry["wall_sec"] = round(time.perf_counter() - t_start, 4)
+        ru = getattr(p, "rusage", None)
+        if ru is not None:
+            entry["cpu_sec"] = round(ru.ru_utime + ru.ru_stime, 4)
+            entry["max_rss_mb"] = round(ru.ru_maxrss / (1024.0 * 1024.0) if sys.platform == "darwin" else ru.ru_maxrss / 1024.0, 1)
+    if killed:
+        rc = killed
+    if rc not in (0, RC_CANCELLED, RC_TIMEOUT) and log_cb:
+        log_cb(f"[HATA] Çıkış kodu: {rc}")
     # Sadece exit code döndür (run_pipeline içinde 0 ile karşılaştırıyoruz)
-    return p.returncode
+    return rc
 
 
-def get_video_info(video_path: str) -> dict:
-    """width, height, r_frame_rate (fps string), duration, has_audio."""
-    ffprobe = get_ffprobe()
+def _run_jobs(jobs: list, max_workers: int = 1, log_cb: Optional[Callable[[str], None]] = None,
+              cancel_event: Optional[threading.Event] = None) -> bool:
+    """
+    jobs: [(etiket, fn)] – fn(job_log) -> bool. max_workers > 1 ise işler thread havuzunda eşzamanlı
+    çalışır (her biri ayrı ffmpeg süreci). Log satırları "[etiket]" önekiyle yazılır.
+    İlk hatada henüz başlamamış işler iptal edilir, cancel_event set edilerek çalışan ffmpeg'ler
+    öldürülür ve False döner. cancel_event dışarıdan set edilirse yeni iş başlatılmaz.
+    """
+    def job_log_for(label):
+        def job_log(s):
+            if log_cb:
+                log_cb(f"[{label}] {s}")
+        return job_log
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    if max_workers <= 1 or len(jobs) <= 1:
+        for label, fn in jobs:
+            if cancelled() or not fn(job_log_for(label)):
+                return False
+        return True
+
+    def guarded(fn, job_log):
+        if cancelled():
+            return False
+        return fn(job_log)
+
+    ok = True
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = {ex.submit(guarded, fn, job_log_for(label)): label for label, fn in jobs}
+        for fut in as_completed(futures):
+            try:
+                res = fut.result()
+            except Exception as e:
+                job_log_for(futures[fut])(f"Hata: {e}")
+                res = False
+            if not res:
+                ok = False
+                for f in futures:
+                    f.cancel()
+                if cancel_event is not None:
+                    cancel_event.set()
+                break
+    return ok
+
+
+# ffprobe sonuçları (path, size, mtime_ns) ile süreç içinde saklanır; isteğe bağlı diskte de
+_probe_cache = {}
+_probe_lock = threading.Lock()
+_probe_disk = None  # {anahtar: ffprobe json}; ilk kullanımda yüklenir
+PROBE_CACHE_FILE = "probe.json"
+PROBE_DISK_MAX_ENTRIES = 2000
+
+
+def _probe_disk_path():
+    return os.path.join(get_app_dir(), CACHE_DIR, PROBE_CACHE_FILE)
+
+
+def _probe_disk_load() -> dict:
+    global _probe_disk
+    if _probe_disk is None:
+        try:
+            with open(_probe_disk_path(), "r", encoding="utf-8") as f:
+                _probe_disk = json.load(f)
+        except Exception:
+            _probe_disk = {}
+    return _probe_disk
+
+
+def _probe_disk_save():
+    path = _probe_disk_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # En eski kayıtlar atılır (dict ekleme sırasını korur)
+        while len(_probe_disk) > PROBE_DISK_MAX_ENTRIES:
+            _probe_disk.pop(next(iter(_probe_disk)))
+        tmp = "%s.%d.tmp" % (path, os.getpid())
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_probe_disk, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def probe_media(path: str, use_disk_cache: bool = False) -> dict:
+    """
+    Tek ffprobe çağrısı: tüm stream'ler + format (ffprobe JSON çıktısı). Hata durumunda exception.
+    Sonuç (path, size, mtime_ns) ile süreç içinde, use_disk_cache ise <app_dir>/cache/probe.json'da saklanır.
+    """
+    st = os.stat(path)
+    key = "%s|%d|%d" % (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _probe_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+        if use_disk_cache and key in _probe_disk_load():
+            _probe_cache[key] = _probe_disk[key]
+            return _probe_disk[key]
     cmd = [
-        ffprobe,
+        get_ffprobe(),
         "-v", "error",
-        "-select_streams", "v:0",
-        "-show_entries", "stream=width,height,r_frame_rate",
-        "-show_entries", "format=duration",
+        "-show_streams",
+        "-show_format",
         "-of", "json",
-        video_path,
+        path,
     ]
+    record_command(cmd)
+    out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, text=True, timeout=30)
+    d = json.loads(out)
+    with _probe_lock:
+        _probe_cache[key] = d
+        if use_disk_cache:
+            _probe_disk_load()[key] = d
+            _probe_disk_save()
+    return d
+
+
+def get_video_info(video_path: str, use_disk_cache: bool = False) -> dict:
+    """width, height, r_frame_rate (fps string), duration, has_audio."""
     try:
-        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, text=True, timeout=30)
-        import json
-        d = json.loads(out)
+        d = probe_media(video_path, use_disk_cache)
         streams = d.get("streams", [])
         fmt = d.get("format", {})
         w = h = 0
         r_frame_rate = "30/1"
         for s in streams:
-            if "width" in s:
+            if (s.get("codec_type") or "").lower() == "video" and "width" in s:
                 w = int(s["width"])
                 h = int(s["height"])
                 r_frame_rate = s.get("r_frame_rate", r_frame_rate)
                 break
         duration = float(fmt.get("duration", 0))
-
-        # Ses stream'ini daha sağlam tespit et (bazı TikTok dosyalarında önceki csv yöntemi şaşabiliyor)
-        cmd2 = [
-            ffprobe,
-            "-v", "error",
-            "-select_streams", "a",
-            "-show_entries", "stream=codec_type",
-            "-of", "json",
-            video_path,
-        ]
-        try:
-            out2 = subprocess.check_output(cmd2, stderr=subprocess.DEVNULL, text=True, timeout=10)
-            d2 = json.loads(out2)
-            a_streams = d2.get("streams", [])
-            has_audio = any((s.get("codec_type") or "").lower() == "audio" for s in a_streams)
-        except Exception:
-            has_audio = False
-
+        has_audio = any((s.get("codec_type") or "").lower() == "audio" for s in streams)
         return {"width": w, "height": h, "r_frame_rate": r_frame_rate, "duration": duration, "has_audio": has_audio}
     except Exception as e:
         return {"width": 0, "height": 0, "r_frame_rate": "30/1", "duration": 0, "has_audio": False, "error": str(e)}
@@ -130,6 +388,29 @@ def _parse_fps(r_frame_rate: str) -> float:
         return 30.0
 
 
+def _extract_frames(ffmpeg: str, video_path: str, times: list, out_paths: list,
+                    log_cb: Optional[Callable[[str], None]] = None, timeout: Optional[int] = None,
+                    cancel_event: Optional[threading.Event] = None) -> bool:
+    """
+    Verilen zamanlardaki kareleri tek ffmpeg çalıştırmasında PNG olarak çıkarır: kaynak bir kez decode
+    edilir, split ile her çıktıya ayrı select=gte(t,T) dalı ve -frames:v 1 uygulanır.
+    Tüm dosyalar oluştuysa True.
+    """
+    if not times:
+        return True
+    n = len(times)
+    labels = "".join("[s%d]" % i for i in range(n))
+    parts = ["[0:v]split=%d%s" % (n, labels) if n > 1 else "[0:v]null[s0]"]
+    for i, t in enumerate(times):
+        parts.append("[s%d]select=gte(t\\,%.3f)[f%d]" % (i, max(0.0, t), i))
+    cmd = [ffmpeg, "-y", "-i", video_path, "-filter_complex", ";".join(parts)]
+    for i, path in enumerate(out_paths):
+        cmd += ["-map", "[f%d]" % i, "-frames:v", "1", "-f", "image2", "-update", "1", path]
+    _run(cmd, log_cb=log_cb, timeout=timeout, cancel_event=cancel_event)
+    return all(os.path.isfile(p) for p in out_paths)
+
+
+@functools.lru_cache(maxsize=None)
 def _font_path():
     """Türkçe destekleyen font: assets/fonts, sonra Windows Segoe UI, sonra Arial."""
     app_dir = get_resource_dir()
@@ -145,6 +426,7 @@ def _font_path():
     return None
 
 
+@functools.lru_cache(maxsize=None)
 def _font_path_bold():
     """Bold font: assets/fonts, sonra Windows bold fontları."""
     app_dir = get_resource_dir()
@@ -168,9 +450,10 @@ def _wrap_text(text, font, max_w, max_lines=3):
     lines = []
     cur = []
     cur_w = 0
+    space_w = font.getlength(" ")
     for word in words:
-        ww = font.getbbox(word)[2] - font.getbbox(word)[0]
-        sp = font.getbbox(" ")[2] if cur else 0
+        ww = font.getlength(word)
+        sp = space_w if cur else 0
         if cur_w + ww + sp <= max_w:
             cur.append(word)
             cur_w += ww + sp
@@ -184,6 +467,92 @@ def _wrap_text(text, font, max_w, max_lines=3):
     return lines[:max_lines]
 
 
+@functools.lru_cache(maxsize=32)
+def _load_font(path, size):
+    """(yol, boyut) başına bir kez yüklenen font; yol yoksa veya okunamazsa Pillow varsayılanı."""
+    _, _, ImageFont = _pil()
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
+
+
+_AVATAR_MEM_MAX = 32
+_avatar_mem = {}  # (logo hash, boyut) -> yuvarlak maskeli RGBA avatar
+_avatar_lock = threading.Lock()
+
+
+def _circular_avatar(logo_path, size, logo_digest=None):
+    """Logoyu boyutlandırıp yuvarlak maskeler; (logo hash, boyut) başına bir kez. Logo okunamazsa None."""
+    key = (logo_digest or file_digest(logo_path), size)
+    with _avatar_lock:
+        av = _avatar_mem.get(key)
+    if av is not None:
+        return av
+    Image, ImageDraw, _ = _pil()
+    try:
+        av = Image.open(logo_path).convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+    except Exception:
+        return None
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, size, size], fill=255)
+    av.putalpha(mask)
+    with _avatar_lock:
+        if len(_avatar_mem) >= _AVATAR_MEM_MAX:
+            _avatar_mem.clear()
+        _avatar_mem[key] = av
+    return av
+
+
+_HEADER_MEM_MAX = 16
+_header_mem = OrderedDict()  # header anahtarı -> (PNG baytları, top_h)
+_header_lock = threading.Lock()  # yalnızca _header_mem ve _header_key_locks erişimi için
+_header_key_locks = {}  # header anahtarı -> üretim kilidi (üretim sürerken)
+
+
+def _header_mem_get(key):
+    with _header_lock:
+        hit = _header_mem.get(key)
+        if hit is not None:
+            _header_mem.move_to_end(key)
+        return hit
+
+
+def _cached_header(key, out_path, produce):
+    """
+    Süreç içi header önbelleği: anahtar başına produce() (disk önbelleği veya create_feed_top_png) bir kez
+    çalışır, sonraki işler PNG baytlarını out_path'e yazar. Toplu işte aynı kanalın videoları header'ı
+    paylaşır. Kilit anahtar başınadır: aynı header'ı isteyen paralel işler bekler, farklı kanal/çözünürlük
+    header'ları aynı anda üretilir. (top_h, bellekten_mi) döner.
+    """
+    hit = _header_mem_get(key)
+    if hit is None:
+        with _header_lock:
+            key_lock = _header_key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            hit = _header_mem_get(key)  # Beklerken başka iş üretmiş olabilir
+            if hit is None:
+                try:
+                    top_h = produce()
+                    if os.path.isfile(out_path):
+                        with open(out_path, "rb") as f:
+                            data = f.read()
+                        with _header_lock:
+                            _header_mem[key] = (data, top_h)
+                            while len(_header_mem) > _HEADER_MEM_MAX:
+                                _header_mem.popitem(last=False)
+                finally:
+                    with _header_lock:
+                        _header_key_locks.pop(key, None)
+                return top_h, False
+    data, top_h = hit
+    with open(out_path, "wb") as f:
+        f.write(data)
+    return top_h, True
+
+
 def create_feed_top_png(
     canvas_w: int,
     canvas_h: int,
@@ -194,13 +563,31 @@ def create_feed_top_png(
     out_path: str,
     avatar_size_ratio: float = None,
     padding_ratio: float = None,
+    logo_digest: str = None,
+    watermark: str = None,
+    layout_size: tuple = None,
 ) -> int:
     """
     3-block feed layout: avatar row + caption block olarak tek PNG üretir.
     Video alanı için kalan yüksekliği döner (canvas_h - top_png_h).
+    Fontlar ve yuvarlak avatar süreç içinde önbelleklenir; logo_digest verilirse logo yeniden hash'lenmez.
+    watermark: avatar satırının sağına kırmızı etiket (ör. "TASLAK"); header her karede olduğundan tüm videoda görünür.
+    layout_size: (w, h) verilirse header bu boyutta yerleştirilip canvas genişliğine küçültülür. Taslakta
+    hedef profilin yerleşimi (font alt sınırları, satır kırılımı) korunur.
     """
-    if not Image or not ImageDraw:
-        raise RuntimeError("Pillow (PIL) yüklü değil. pip install Pillow")
+    Image, ImageDraw, _ = _pil()
+
+    if layout_size and tuple(layout_size) != (canvas_w, canvas_h):
+        layout_w, layout_h = layout_size
+        full_h = create_feed_top_png(
+            layout_w, layout_h, logo_path, channel_name, username, post_text, out_path,
+            avatar_size_ratio, padding_ratio, logo_digest, watermark,
+        )
+        top_h = max(1, int(round(full_h * canvas_w / float(layout_w))))
+        with Image.open(out_path) as full:
+            small = full.resize((canvas_w, top_h), Image.Resampling.LANCZOS)
+        small.save(out_path, "PNG")
+        return top_h
 
     bg = (255, 255, 255)
     pad = int(canvas_w * (padding_ratio or 0.04))
@@ -211,20 +598,12 @@ def create_feed_top_png(
 
     ch_font_sz = max(28, int(avatar_row_h * 0.28))
     user_font_sz = max(22, int(avatar_row_h * 0.22))
-    fp = _font_path()
-    try:
-        f_ch = ImageFont.truetype(fp, ch_font_sz) if fp else ImageFont.load_default()
-        f_user = ImageFont.truetype(fp, user_font_sz) if fp else ImageFont.load_default()
-    except Exception:
-        f_ch = f_user = ImageFont.load_default()
+    f_ch = _load_font(_font_path(), ch_font_sz)
+    f_user = _load_font(_font_path(), user_font_sz)
 
     # --- SECTION 2: Caption block (ölçüm) – bold, daha büyük ---
     caption_font_sz = max(36, int(canvas_w * 0.052))
-    fp_bold = _font_path_bold()
-    try:
-        f_cap = ImageFont.truetype(fp_bold, caption_font_sz) if fp_bold else ImageFont.load_default()
-    except Exception:
-        f_cap = ImageFont.load_default()
+    f_cap = _load_font(_font_path_bold(), caption_font_sz)
 
     cap_max_w = canvas_w - pad * 2
     cap_lines = _wrap_text(post_text or "", f_cap, cap_max_w, max_lines=3)
@@ -243,16 +622,9 @@ def create_feed_top_png(
     av_x = pad
     av_y = (avatar_row_h - avatar_size) // 2
     if os.path.isfile(logo_path):
-        try:
-            av = Image.open(logo_path).convert("RGBA").resize(
-                (avatar_size, avatar_size), Image.Resampling.LANCZOS
-            )
-            mask = Image.new("L", (avatar_size, avatar_size), 0)
-            ImageDraw.Draw(mask).ellipse([0, 0, avatar_size, avatar_size], fill=255)
-            av.putalpha(mask)
+        av = _circular_avatar(logo_path, avatar_size, logo_digest)
+        if av is not None:
             img.paste(av, (av_x, av_y), av)
-        except Exception:
-            pass
 
     # Channel name + username
     txt_x = av_x + avatar_size + pad
@@ -262,10 +634,22 @@ def create_feed_top_png(
     draw.text((txt_x, txt_y), channel_name or "", fill=(0, 0, 0), font=f_ch)
     draw.text((txt_x, txt_y + ch_h + 4), username or "", fill=(120, 120, 120), font=f_user)
 
+    if watermark:
+        f_wm = _load_font(_font_path_bold(), ch_font_sz)
+        wb = f_wm.getbbox(watermark)
+        wm_w, wm_h = wb[2] - wb[0], wb[3] - wb[1]
+        box_pad = max(6, ch_font_sz // 3)
+        x1 = canvas_w - pad
+        x0 = x1 - wm_w - 2 * box_pad
+        y0 = (avatar_row_h - wm_h) // 2 - box_pad
+        draw.rounded_rectangle([x0, y0, x1, y0 + wm_h + 2 * box_pad], radius=box_pad, fill=(220, 38, 38))
+        draw.text((x0 + box_pad - wb[0], y0 + box_pad - wb[1]), watermark, fill=(255, 255, 255), font=f_wm)
+
     # Caption block (ortalanmış)
     cap_y = avatar_row_h
     for i, line in enumerate(cap_lines):
-        line_w = f_cap.getbbox(line)[2] - f_cap.getbbox(line)[0] if line else 0
+        bb = f_cap.getbbox(line) if line else (0, 0, 0, 0)
+        line_w = bb[2] - bb[0]
         lx = (canvas_w - line_w) // 2
         draw.text((lx, cap_y + i * line_h), line, fill=(30, 30, 30), font=f_cap)
 
@@ -274,10 +658,214 @@ def create_feed_top_png(
 
 
 # Çözünürlük: dikey video (genişlik x yükseklik), crf, x264_preset
+# "draft": yerleşim / yorum zamanlaması onayı için hızlı önizleme (TASLAK etiketli, en fazla 30 fps)
+DRAFT_PROFILE = "draft"
 RESOLUTION_PARAMS = {
+    DRAFT_PROFILE: (360, 640, 30, "ultrafast"),
     "720p": (720, 1280, 23, "fast"),
     "1080p": (1080, 1920, 23, "fast"),
 }
+DRAFT_MAX_FPS = 30
+DRAFT_WATERMARK = "TASLAK"
+DRAFT_LAYOUT_PROFILE = "1080p"  # Taslak header'ı bu profilin boyutunda yerleştirilip küçültülür
+
+# Ara segmentlerin hepsi aynı stream parametreleriyle encode edilir; böylece son birleştirme
+# yeniden encode etmeden (-c copy) yapılabilir. stitchable=1: x264 SPS/PPS'yi içeriğe göre
+# optimize etmez, farklı dosyalardaki parçalar tek akışta decode edilebilir.
+X264_PROFILE = "high"
+X264_LEVEL = "4.2"
+VIDEO_TIMESCALE = "90000"
+# Ses: profil -> (bitrate, örnekleme hızı, kanal)
+AUDIO_PARAMS = {
+    DRAFT_PROFILE: ("64k", "22050", "1"),
+    "720p": ("256k", "44100", "2"),
+    "1080p": ("256k", "44100", "2"),
+}
+
+
+# Durağan yorum klipleri: tekrarlanan kare için lookahead, mbtree, sahne algılama ve geniş hareket araması
+# gereksiz. Bu ayarlar yalnızca encoder kararlarını değiştirir, SPS/PPS aynı kalır (-c copy birleştirme bozulmaz).
+STILL_X264_PARAMS = "rc-lookahead=0:mbtree=0:me=dia:scenecut=0:b-adapt=0:partitions=none"
+_X264_PRESET_SUBME = {
+    "ultrafast": 0, "superfast": 1, "veryfast": 2, "faster": 4, "fast": 6,
+    "medium": 7, "slow": 8, "slower": 9, "veryslow": 10, "placebo": 11,
+}
+
+
+def _still_x264_params(x264_preset: str) -> str:
+    """
+    Profilin preset'ine göre durağan klip x264 ayarları. subme 1'e indirilir (preset zaten düşükse dokunulmaz).
+    psy-rd yalnızca subme >= 6'da çalışır ve x264 onu açarken PPS'teki chroma_qp_index_offset'i 2 düşürür
+    (stillimage'da psy-rd 2.0); subme düşünce aynı PPS için bu fark chroma-qp-offset ile elle verilir.
+    """
+    params = STILL_X264_PARAMS
+    subme = _X264_PRESET_SUBME.get(x264_preset, 7)
+    if subme > 1:
+        params += ":subme=1"
+        if subme >= 6:
+            params += ":chroma-qp-offset=-2"
+    return params
+
+
+def _encode_args(x264_preset: str, crf: int, fps: int, audio: tuple = None, x264_params: str = "") -> list:
+    """
+    Tüm segmentler (intro, seg_N, main parçaları) için ortak video/ses encode argümanları.
+    x264_params: stitchable=1'e eklenen x264 ayarları (ayrı -x264-params öncekini ezeceği için burada birleşir).
+    """
+    bitrate, rate, channels = audio or AUDIO_PARAMS["1080p"]
+    return [
+        "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf),
+        "-profile:v", X264_PROFILE, "-level:v", X264_LEVEL,
+        "-x264-params", "stitchable=1" + (":" + x264_params if x264_params else ""),
+        "-pix_fmt", "yuv420p", "-r", str(fps), "-video_track_timescale", VIDEO_TIMESCALE,
+        "-c:a", "aac", "-b:a", bitrate, "-ar", rate, "-ac", channels,
+    ]
+
+
+def _still_encode_args(x264_preset: str, crf: int, fps: int, audio: tuple, t_dur: float) -> tuple:
+    """
+    Yorum klibi: kare sayısı TTS süresini kapsar. (kare sayısı, encode argümanları): ortak argümanlar +
+    durağan içerik ayarları (_still_x264_params, stillimage, tek GOP).
+    """
+    n_frames = max(1, int(math.ceil(t_dur * fps)))
+    return n_frames, _encode_args(x264_preset, crf, fps, audio, _still_x264_params(x264_preset)) + [
+        "-tune", "stillimage", "-g", str(n_frames)]
+
+
+def _build_still_clip_cmd(ffmpeg: str, still_png: str, audio_path: str, t_dur: float, fps: int,
+                          still_args: tuple, output_path: str) -> list:
+    """
+    Tek kareyi (PNG) loop filtresiyle t_dur boyunca tekrarlayıp ses ile encode eden komut.
+    still_args: _still_encode_args sonucu. -t/-shortest son kareyi ses süresine kırpar.
+    """
+    n_frames, encode_args = still_args
+    return [
+        ffmpeg, "-y", "-framerate", str(fps), "-i", still_png, "-i", audio_path,
+        "-filter_complex",
+        f"[0:v]format=yuv420p,loop=loop={n_frames - 1}:size=1:start=0,setpts=N/({fps}*TB),setsar=1[v]",
+        "-map", "[v]", "-map", "1:a", "-t", str(t_dur),
+    ] + encode_args + ["-shortest", output_path]
+
+
+# Render yolu: "multi" = segment başına ayrı ffmpeg + concat, "single" = tek filter_complex grafiği
+RENDER_MODES = ("multi", "single")
+
+
+def _build_single_pass_cmd(
+    ffmpeg: str,
+    video_path: str,
+    header_png: str,
+    comment_segments: list,
+    segment_durations: list,
+    t_list: list,
+    D: float,
+    has_audio: bool,
+    layout: dict,
+    encode_args: list,
+    output_path: str,
+) -> list:
+    """
+    Tüm timeline'ı tek filter_complex grafiği olarak kurar: kaynak bir kez decode edilir,
+    çıktı bir kez encode edilir. Sıra: yorum_1 + main[0:t1] + yorum_2 + main[t1:t2] + ...
+    layout: out_w, out_h, fps, video_target_w, video_target_h, video_area_y, comment_max_w, comment_x, comment_y
+    """
+    out_w, out_h, fps = layout["out_w"], layout["out_h"], layout["fps"]
+    N = len(comment_segments)
+
+    inputs = ["-i", video_path, "-i", header_png]
+    next_idx = 2
+    if has_audio:
+        audio_src = "[0:a]"
+    else:
+        inputs += ["-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo"]
+        audio_src = "[%d:a]" % next_idx
+        next_idx += 1
+    comment_idx = []
+    tts_idx = []
+    for seg, (tts_path, _) in zip(comment_segments, segment_durations):
+        inputs += ["-i", seg["comment_image_path"]]
+        comment_idx.append(next_idx)
+        inputs += ["-i", tts_path]
+        tts_idx.append(next_idx + 1)
+        next_idx += 2
+
+    # Timeline parçaları: ("still", yorum_idx, kare_zamanı) / ("piece", start, end)
+    parts = []
+    for i in range(N):
+        seek_time = 0.0 if i == 0 else (min(t_list[i], D - 0.5) if D > 0.5 else 0)
+        parts.append(("still", i, seek_time))
+        start = t_list[i]
+        end = t_list[i + 1] if i + 1 < N else D
+        if end > start + 0.05:
+            parts.append(("piece", start, end))
+    n_pieces = sum(1 for p in parts if p[0] == "piece")
+
+    fmt_a = "aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo"
+    graph = [
+        f"color=c=white:s={out_w}x{out_h}:r={fps}[canvas]",
+        "[canvas][1:v]overlay=0:0[with_header]",
+        f"[0:v]setpts=PTS-STARTPTS,fps={fps},scale={layout['video_target_w']}:{layout['video_target_h']}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={layout['video_target_w']}:{layout['video_target_h']}:(ow-iw)/2:(oh-ih)/2:color=white[scaled]",
+        f"[with_header][scaled]overlay=0:{layout['video_area_y']}:shortest=1,split={len(parts)}" + "".join("[b%d]" % k for k in range(len(parts))),
+    ]
+    if n_pieces:
+        graph.append(f"{audio_src}{fmt_a},asplit={n_pieces}" + "".join("[ab%d]" % k for k in range(n_pieces)))
+
+    concat_in = []
+    piece_no = 0
+    for k, part in enumerate(parts):
+        if part[0] == "still":
+            _, i, seek_time = part
+            dur = segment_durations[i][1]
+            n_frames = max(1, int(round(dur * fps)))
+            graph.append(
+                f"[b{k}]trim=start={seek_time},setpts=PTS-STARTPTS,trim=end_frame=1,"
+                f"loop=loop={n_frames - 1}:size=1:start=0,setpts=N/({fps}*TB)[still{i}]"
+            )
+            graph.append(f"[{comment_idx[i]}:v]scale={layout['comment_max_w']}:-1[comment{i}]")
+            graph.append(f"[still{i}][comment{i}]overlay={layout['comment_x']}:{layout['comment_y']}[sv{i}]")
+            graph.append(f"[{tts_idx[i]}:a]{fmt_a},apad,atrim=end={dur},asetpts=PTS-STARTPTS[sa{i}]")
+            concat_in.append(f"[sv{i}][sa{i}]")
+        else:
+            _, start, end = part
+            graph.append(f"[b{k}]trim=start={start}:end={end},setpts=PTS-STARTPTS[pv{piece_no}]")
+            graph.append(f"[ab{piece_no}]atrim=start={start}:end={end},asetpts=PTS-STARTPTS[pa{piece_no}]")
+            concat_in.append(f"[pv{piece_no}][pa{piece_no}]")
+            piece_no += 1
+    graph.append("".join(concat_in) + f"concat=n={len(parts)}:v=1:a=1[cv][a]")
+    graph.append("[cv]setsar=1,format=yuv420p[v]")
+
+    return [ffmpeg, "-y"] + inputs + [
+        "-filter_complex", ";".join(graph), "-map", "[v]", "-map", "[a]",
+    ] + encode_args + [output_path]
+
+
+class RenderResult:
+    """run_pipeline sonucu. bool(result) başarı durumudur (eski bool dönüşüyle uyumlu)."""
+
+    def __init__(self, ok: bool, output_path: str, seconds: float, error: str = "", stages: Optional[list] = None):
+        self.ok = bool(ok)
+        self.output_path = output_path
+        self.seconds = seconds
+        self.error = error
+        self.stages = stages or []
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        return "RenderResult(ok=%r, output_path=%r, seconds=%.2f)" % (self.ok, self.output_path, self.seconds)
+
+    def stage_seconds(self) -> dict:
+        """Aşama adı -> wall_sec (aynı adlı aşamalar toplanır)."""
+        out = {}
+        for r in self.stages:
+            if "wall_sec" in r:
+                out[r["stage"]] = round(out.get(r["stage"], 0.0) + r["wall_sec"], 4)
+        return out
+
+    def to_dict(self) -> dict:
+        return {"ok": self.ok, "output_path": self.output_path, "seconds": self.seconds,
+                "error": self.error, "stages": self.stages}
 
 
 def run_pipeline(
@@ -294,11 +882,60 @@ def run_pipeline(
     avatar_size_ratio: float = None,
     header_padding_ratio: float = None,
     comment_text_size_ratio: float = None,
-) -> bool:
+    render_mode: str = "multi",
+    max_workers: int = 1,
+    use_cache: bool = False,
+    progress_cb: Optional[Callable[[dict], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    tracer: Optional[Tracer] = None,
+) -> RenderResult:
     """
     Intro (N yorum segmenti: her biri first frame + header + yorum görseli + TTS) + main.
     comment_segments: [{"comment_image_path": str, "tts_audio_path": str, "tts_duration_sec": float}, ...]
+    render_mode: "multi" (segment başına ayrı ffmpeg + concat) veya "single" (tek filter_complex, tek encode).
+    max_workers: multi modda eşzamanlı ffmpeg işi sayısı (1 = sıralı).
+    use_cache: ara dosyalar (ilk kare, header, yorum klipleri, ana video parçaları) girdi/parametre
+        hash'i ile <app_dir>/cache/render altında saklanır; anahtarı eşleşen aşamalar atlanır.
+    progress_cb: {"stage", "percent", "speed", "eta"} olayları; percent toplam timeline'ın (video + yorumlar)
+        encode edilen kısmı, eta saniye (bilinmiyorsa None). Paralel işlerde farklı thread'lerden çağrılır.
+    cancel_event: set edilince çalışan ffmpeg süreç grupları öldürülür, yeni aşama başlatılmaz ve False döner.
+    tracer: aşama kayıtları (süre, CPU, boyutlar, ffmpeg argv) buna eklenir; path'i varsa JSONL'e yazılır.
+    Dönüş: RenderResult (bool olarak başarı; aşama kayıtları ve son hata mesajı ile).
     """
+    tracer = tracer or Tracer()
+    first_stage = len(tracer.records)
+    errors = []
+
+    def log(s):
+        if "Hata:" in s or "[HATA]" in s:
+            errors.append(s)
+        if log_cb:
+            log_cb(s)
+
+    t0 = time.perf_counter()
+    ok = _run_pipeline(
+        video_path, logo_path, channel_name, username, comment_segments, output_path, log,
+        quality_resolution, quality_fps, post_text, avatar_size_ratio, header_padding_ratio,
+        comment_text_size_ratio, render_mode, max_workers, use_cache, progress_cb, cancel_event, tracer,
+    )
+    seconds = round(time.perf_counter() - t0, 4)
+    if ok:
+        error = ""
+    elif cancel_event is not None and cancel_event.is_set():
+        error = "İptal edildi."
+    else:
+        error = errors[-1] if errors else "Render başarısız."
+    tracer.event("pipeline", ok=bool(ok), wall_sec=seconds, render_mode=render_mode, error=error,
+                 output_bytes={output_path: os.path.getsize(output_path) if ok and os.path.isfile(output_path) else None})
+    return RenderResult(ok, output_path, seconds, error, tracer.records[first_stage:])
+
+
+def _run_pipeline(
+    video_path, logo_path, channel_name, username, comment_segments, output_path, log_cb,
+    quality_resolution, quality_fps, post_text, avatar_size_ratio, header_padding_ratio,
+    comment_text_size_ratio, render_mode, max_workers, use_cache, progress_cb, cancel_event, tracer,
+) -> bool:
+    """run_pipeline gövdesi; her aşama tracer.stage ile ölçülür."""
     def log(s):
         if log_cb:
             log_cb(s)
@@ -307,34 +944,120 @@ def run_pipeline(
         log("Hata: En az bir yorum segmenti gerekli.")
         return False
 
-    res = RESOLUTION_PARAMS.get(quality_resolution, RESOLUTION_PARAMS["1080p"])
-    out_w, out_h, crf, x264_preset = res
+    if render_mode not in RENDER_MODES:
+        log("Hata: Bilinmeyen render modu: %s" % render_mode)
+        return False
+
+    if quality_resolution not in RESOLUTION_PARAMS:
+        quality_resolution = "1080p"
+    out_w, out_h, crf, x264_preset = RESOLUTION_PARAMS[quality_resolution]
+    audio = AUDIO_PARAMS[quality_resolution]
     fps = 60 if quality_fps == "60" else 30
+    draft = quality_resolution == DRAFT_PROFILE
+    if draft:
+        fps = min(fps, DRAFT_MAX_FPS)
+        log("Taslak profil: %dx%d, %s, %d fps" % (out_w, out_h, x264_preset, fps))
 
     ffmpeg = get_ffmpeg()
-    ffprobe = get_ffprobe()
-    info = get_video_info(video_path)
+    with tracer.stage("probe", inputs=[video_path]) as rec:
+        info = get_video_info(video_path, use_disk_cache=use_cache)
+        rec["ok"] = info.get("width", 0) > 0
     if info.get("width", 0) == 0:
         log("Hata: Video bilgisi alınamadı.")
         return False
 
+    cache = get_render_cache() if use_cache else None
+    # Dış iptal veya paralel işlerden birinin hatası: çalışan tüm ffmpeg süreçleri sonlandırılır
+    abort = CancelEvent(cancel_event)
+
+    def cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            log("İptal edildi.")
+            return True
+        return False
+    src_id = source_identity(video_path)
+    enc_id = [out_w, out_h, crf, x264_preset, fps, _encode_args(x264_preset, crf, fps, audio)]
+
+    # İlerleme: her aşamanın encode ettiği timeline saniyesi toplanır, toplam timeline'a oranlanır
+    progress_lock = threading.Lock()
+    stage_done = {}
+    timeline_total = [0.0]
+    t_start = time.perf_counter()
+
+    def stage_progress(stage, span):
+        """_run için progress_cb: aşamanın out_time'ını toplam yüzdeye çevirip progress_cb'ye iletir."""
+        def cb(p):
+            if not progress_cb:
+                return
+            with progress_lock:
+                stage_done[stage] = min(span, max(0.0, p.get("out_time") or 0.0))
+                done = sum(stage_done.values())
+            total = timeline_total[0]
+            percent = min(100.0, 100.0 * done / total) if total > 0 else 0.0
+            elapsed = time.perf_counter() - t_start
+            eta = elapsed * (100.0 - percent) / percent if percent > 0 else None
+            progress_cb({
+                "stage": stage,
+                "percent": round(percent, 1),
+                "speed": p.get("speed"),
+                "eta": round(eta, 1) if eta is not None else None,
+            })
+        return cb
+
+    def cached_stage(key, out_path, produce, job_log=log, progress=None, stage=None, inputs=()):
+        """Önbellekte varsa kopyala, yoksa üret ve sakla. Aşama tracer'a stage adıyla kaydedilir."""
+        with tracer.stage(stage or os.path.basename(out_path), inputs=inputs, outputs=[out_path]) as rec:
+            if cache and cache.fetch(key, out_path) is not None:
+                job_log("Önbellekten: " + os.path.basename(out_path))
+                rec["cache_hit"] = True
+                if progress:
+                    progress({"out_time": float("inf"), "speed": None})
+                return True
+            rec["cache_hit"] = False
+            if not produce():
+                rec["ok"] = False
+                return False
+            if cache:
+                cache.store(key, out_path)
+            return True
+
     tmpdir = tempfile.mkdtemp(prefix="tts_video_")
     try:
         first_frame = os.path.join(tmpdir, "first.png")
         header_png = os.path.join(tmpdir, "header.png")
-        main_mp4 = os.path.join(tmpdir, "main.mp4")
         list_txt = os.path.join(tmpdir, "list.txt")
 
-        _run([ffmpeg, "-y", "-i", video_path, "-vframes", "1", "-f", "image2", "-update", "1", first_frame], log_cb=log, timeout=30)
-        if not os.path.isfile(first_frame):
-            log("Hata: İlk kare çıkarılamadı.")
-            return False
-
         # 3-block layout: avatar row + caption + video
-        top_h = create_feed_top_png(
-            out_w, out_h, logo_path, channel_name, username, post_text or "",
-            header_png, avatar_size_ratio, header_padding_ratio
+        logo_digest = file_digest(logo_path)
+        layout_size = RESOLUTION_PARAMS[DRAFT_LAYOUT_PROFILE][:2] if draft else None
+        header_key = ArtifactCache.key(
+            "header", CACHE_VERSION, out_w, out_h, logo_digest, channel_name, username, post_text or "",
+            avatar_size_ratio, header_padding_ratio, _font_path(), _font_path_bold(),
+            DRAFT_WATERMARK if draft else None, layout_size,
         )
+        with tracer.stage("header", inputs=[logo_path], outputs=[header_png]) as rec:
+            def produce_header():
+                meta = cache.fetch(header_key, header_png) if cache else None
+                rec["cache_hit"] = meta is not None and "top_h" in meta
+                if rec["cache_hit"]:
+                    log("Önbellekten: header.png")
+                    return int(meta["top_h"])
+                top_h = create_feed_top_png(
+                    out_w, out_h, logo_path, channel_name, username, post_text or "",
+                    header_png, avatar_size_ratio, header_padding_ratio, logo_digest,
+                    watermark=DRAFT_WATERMARK if draft else None, layout_size=layout_size,
+                )
+                if cache and os.path.isfile(header_png):
+                    cache.store(header_key, header_png, {"top_h": top_h})
+                return top_h
+
+            if cache:
+                top_h, rec["memory_hit"] = _cached_header(header_key, header_png, produce_header)
+                if rec["memory_hit"]:
+                    rec["cache_hit"] = True
+                    log("Önbellekten (bellek): header.png")
+            else:
+                top_h = produce_header()
         if not os.path.isfile(header_png):
             log("Hata: Header oluşturulamadı.")
             return False
@@ -352,17 +1075,16 @@ def run_pipeline(
         comment_x = "(main_w-overlay_w)/2"
         comment_y = f"{video_area_y}+(({video_area_h}-overlay_h)/2)"
 
-        # TTS sürelerini hesapla (hepsi için) – artık trim yok, direkt gerçek süre
+        # TTS süreleri: generate_tts'in ölçtüğü süre kullanılır; yalnızca eksikse dosyadan ölçülür
         segment_durations = []
         for idx, seg in enumerate(comment_segments):
             tts_path = seg["tts_audio_path"]
-            dur = get_audio_duration_seconds(tts_path) or seg["tts_duration_sec"]
+            dur = float(seg.get("tts_duration_sec") or 0)
             if dur <= 0:
-                dur = seg["tts_duration_sec"]
+                dur = get_audio_duration_seconds(tts_path)
             segment_durations.append((tts_path, dur))
 
         D = max(0.1, float(info.get("duration", 0)))
-        main_duration = D
         N = len(comment_segments)
 
         # Yerleşim: videoyu N+1 eşit parçaya bölen noktalar. Yorumlar bu noktalarda "duraklatma" (araya ekleme).
@@ -373,123 +1095,178 @@ def run_pipeline(
             if t_list[i] >= D - 0.01:
                 t_list[i] = max(0.0, D - 0.01)
 
-        # 1) İlk yorum videonun en başında (intro) - feed-style layout
-        seg0 = comment_segments[0]
-        tts_use_0, t1 = segment_durations[0]
-        intro_0 = os.path.join(tmpdir, "intro_0.mp4")
-        # Canvas: beyaz arka plan + header üstte + video kalan alanı kaplıyor + comment overlay videonun ÜSTÜNE
-        filter_intro = (
-            f"color=c=white:s={out_w}x{out_h}[canvas];"
-            f"[canvas][1:v]overlay=0:0[with_header];"
-            f"[0:v]scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled_video];"
-            f"[with_header][scaled_video]overlay=0:{video_area_y}[with_video];"
-            f"[2:v]scale={comment_max_w}:-1[comment];"
-            f"[with_video][comment]overlay={comment_x}:{comment_y}[v]"
-        )
-        cmd_intro0 = [
-            ffmpeg, "-y", "-loop", "1", "-i", first_frame, "-i", header_png, "-i", seg0["comment_image_path"], "-i", tts_use_0,
-            "-filter_complex", filter_intro, "-map", "[v]", "-map", "3:a", "-t", str(t1),
-            "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-            "-c:a", "aac", "-b:a", "256k", "-ar", "44100", "-ac", "2", "-shortest", intro_0,
-        ]
-        if _run(cmd_intro0, log_cb=log, timeout=300) != 0:
-            log("Hata: Intro (yorum 1) oluşturulamadı.")
-            return False
+        timeline_total[0] = D + sum(d for _, d in segment_durations)
+
+        if render_mode == "single":
+            out_dir = os.path.dirname(output_path)
+            if out_dir and not os.path.isdir(out_dir):
+                os.makedirs(out_dir, exist_ok=True)
+            layout = {
+                "out_w": out_w, "out_h": out_h, "fps": fps,
+                "video_target_w": video_target_w, "video_target_h": video_target_h,
+                "video_area_y": video_area_y, "comment_max_w": comment_max_w,
+                "comment_x": comment_x, "comment_y": comment_y,
+            }
+            encode_args = _encode_args(x264_preset, crf, fps, audio) + ["-movflags", "+faststart"]
+            cmd_single = _build_single_pass_cmd(
+                ffmpeg, video_path, header_png, comment_segments, segment_durations,
+                t_list, D, info.get("has_audio", True), layout, encode_args, output_path,
+            )
+            # Tek encode tüm timeline'ı kapsar; zaman aşımı toplam süreyle ölçeklenir
+            total = timeline_total[0]
+            single_inputs = [video_path, header_png] + [p for seg in comment_segments
+                                                        for p in (seg["comment_image_path"], seg["tts_audio_path"])]
+            with tracer.stage("single", inputs=single_inputs, outputs=[output_path]) as rec:
+                rc = _run(cmd_single, log_cb=log, timeout=max(600, int(total * 20)),
+                          progress_cb=stage_progress("single", total), cancel_event=abort)
+                rec["ok"] = rc == 0
+            if rc != 0:
+                if cancelled():
+                    return False
+                log("Hata: Tek geçişli render başarısız.")
+                return False
+            log("Render tamamlandı: " + output_path)
+            return True
 
-        # 2) Ana video tam (feed-style: canvas + header + video kalan alanı kaplıyor)
-        filter_main = (
-            f"color=c=white:s={out_w}x{out_h}[canvas];"
-            f"[canvas][1:v]overlay=0:0[with_header];"
-            f"[0:v]scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled];"
-            f"[with_header][scaled]overlay=0:{video_area_y}[v]"
-        )
         has_audio = info.get("has_audio", True)
-        if has_audio:
-            cmd_main = [
-                ffmpeg, "-y", "-i", video_path, "-i", header_png, "-filter_complex", filter_main,
-                "-map", "[v]", "-map", "0:a", "-t", str(main_duration),
-                "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-                "-c:a", "aac", "-b:a", "256k", "-ar", "44100", "-ac", "2", main_mp4,
-            ]
-        else:
-            filter_main = (
+
+        # Yorum klipleri için duraklatma kareleri (yorum 1: ilk kare, diğerleri t_list[i]) tek decode'da çıkarılır;
+        # önbellekte olanlar atlanır.
+        frame_paths = []
+        missing = []
+        for i in range(N):
+            t = 0.0 if i == 0 else (min(t_list[i], D - 0.5) if D > 0.5 else 0.0)
+            path = first_frame if i == 0 else os.path.join(tmpdir, "frame_%d.png" % i)
+            key = ArtifactCache.key("frame", CACHE_VERSION, src_id, round(t, 3))
+            frame_paths.append(path)
+            if cache and cache.fetch(key, path) is not None:
+                log("Önbellekten: " + os.path.basename(path))
+            else:
+                missing.append((t, path, key))
+        if missing:
+            with tracer.stage("frames", inputs=[video_path], outputs=[p for _, p, _ in missing],
+                              times=[round(t, 3) for t, _, _ in missing]) as frames_rec:
+                frames_rec["ok"] = _extract_frames(
+                    ffmpeg, video_path, [t for t, _, _ in missing], [p for _, p, _ in missing],
+                    log_cb=log, timeout=max(60, int(max(t for t, _, _ in missing) * 4)), cancel_event=abort,
+                )
+            if cache:
+                for _, path, key in missing:
+                    if os.path.isfile(path):
+                        cache.store(key, path)
+        if cancelled():
+            return False
+        if not os.path.isfile(first_frame):
+            log("Hata: İlk kare çıkarılamadı.")
+            return False
+
+        def comment_filter():
+            # Canvas: beyaz arka plan + header üstte + video kalan alanı kaplıyor + comment overlay videonun ÜSTÜNE
+            return (
                 f"color=c=white:s={out_w}x{out_h}[canvas];"
-                f"[canvas][2:v]overlay=0:0[with_header];"
-                f"[0:v]scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled];"
-                f"[with_header][scaled]overlay=0:{video_area_y}[v];"
-                f"[1:a]atrim=0:{main_duration},asetpts=PTS-STARTPTS[a]"
+                f"[canvas][1:v]overlay=0:0[with_header];"
+                f"[0:v]scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled_video];"
+                f"[with_header][scaled_video]overlay=0:{video_area_y}[with_video];"
+                f"[2:v]scale={comment_max_w}:-1[comment];"
+                f"[with_video][comment]overlay={comment_x}:{comment_y},setsar=1[v]"
             )
-            cmd_main = [
-                ffmpeg, "-y", "-i", video_path, "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo", "-i", header_png,
-                "-filter_complex", filter_main, "-map", "[v]", "-map", "[a]", "-t", str(main_duration),
-                "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-                "-c:a", "aac", "-b:a", "256k", main_mp4,
-            ]
-        if _run(cmd_main, log_cb=log, timeout=600) != 0:
-            log("Hata: Main segment oluşturulamadı.")
-            return False
 
-        concat_parts = [intro_0]
+        def still_encode_args(t_dur):
+            return _still_encode_args(x264_preset, crf, fps, audio, t_dur)
 
-        def cut_main(ss, t, out_path):
-            """Main videodan ss..ss+t aralığını A/V birlikte, hassas şekilde kes (yeniden encode)."""
-            end = ss + t
-            filter_trim = (
-                f"[0:v]trim=start={ss}:end={end},setpts=PTS-STARTPTS[v];"
-                f"[0:a]atrim=start={ss}:end={end},asetpts=PTS-STARTPTS[a]"
+        def piece_filter(t):
+            """Ana video parçasının filtre grafiği (ses yoksa sessiz kaynak t saniyeye kırpılır)."""
+            graph = (
+                f"color=c=white:s={out_w}x{out_h}[canvas];"
+                f"[canvas][1:v]overlay=0:0[with_header];"
+                f"[0:v]setpts=PTS-STARTPTS,scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled];"
+                f"[with_header][scaled]overlay=0:{video_area_y}:shortest=1,setsar=1[v]"
             )
+            if has_audio:
+                return graph + ";[0:a]asetpts=PTS-STARTPTS[a]"
+            return graph + f";[2:a]atrim=0:{t},asetpts=PTS-STARTPTS[a]"
+
+        def render_comment(idx, out_path, job_log, progress=None):
+            """
+            Yorum klibi: kare (yorum 1 için ilk kare, diğerleri t_list[idx]) + header + yorum görseli + TTS.
+            Klip sabit bir görüntü: kompozit tek karelik bir çalıştırmada PNG'ye yazılır, sonra bu kare
+            loop filtresiyle tekrarlanıp durağan içerik ayarlarıyla (stillimage, tek GOP) encode edilir.
+            """
+            seg = comment_segments[idx]
+            tts_use, t_dur = segment_durations[idx]
+            frame_at = frame_paths[idx] if os.path.isfile(frame_paths[idx]) else first_frame
+            still = os.path.join(tmpdir, "still_%d.png" % idx)
             cmd = [
-                ffmpeg, "-y", "-i", main_mp4,
-                "-filter_complex", filter_trim,
-                "-map", "[v]", "-map", "[a]",
-                "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-                "-c:a", "aac", "-b:a", "256k", "-ar", "44100", "-ac", "2",
-                out_path,
+                ffmpeg, "-y", "-i", frame_at, "-i", header_png, "-i", seg["comment_image_path"],
+                "-filter_complex", comment_filter(), "-map", "[v]", "-frames:v", "1", "-f", "image2", "-update", "1", still,
             ]
-            return _run(cmd, log_cb=log, timeout=240) == 0 and os.path.isfile(out_path)
+            if _run(cmd, log_cb=job_log, timeout=60, cancel_event=abort) != 0 or not os.path.isfile(still):
+                if not abort.is_set():  # İptal / kardeş işin hatası: ayrıca hata yazma
+                    job_log("Hata: Yorum %d görüntüsü oluşturulamadı." % (idx + 1))
+                return False
+            cmd = _build_still_clip_cmd(ffmpeg, still, tts_use, t_dur, fps, still_encode_args(t_dur), out_path)
+            if _run(cmd, log_cb=job_log, timeout=max(300, int(t_dur * 20)), progress_cb=progress, cancel_event=abort) != 0:
+                if not abort.is_set():  # İptal / kardeş işin hatası: ayrıca hata yazma
+                    job_log("Hata: Yorum %d segmenti oluşturulamadı." % (idx + 1))
+                return False
+            return True
 
-        if N == 1:
-            concat_parts.append(main_mp4)
-        else:
-            # Yorum 2..N klipleri: yerleşim zamanları t_list[1], t_list[2], ...
-            for idx in range(1, N):
-                seg = comment_segments[idx]
-                tts_use, t_dur = segment_durations[idx]
-                seek_time = min(t_list[idx], D - 0.5) if D > 0.5 else 0
-                frame_at = os.path.join(tmpdir, "frame_%d.png" % idx)
-                _run([ffmpeg, "-y", "-ss", str(seek_time), "-i", video_path, "-vframes", "1", "-f", "image2", "-update", "1", frame_at], log_cb=log, timeout=30)
-                if not os.path.isfile(frame_at):
-                    frame_at = first_frame
-                seg_mp4 = os.path.join(tmpdir, "seg_%d.mp4" % idx)
-                filter_seg = (
-                    f"color=c=white:s={out_w}x{out_h}[canvas];"
-                    f"[canvas][1:v]overlay=0:0[with_header];"
-                    f"[0:v]scale={video_target_w}:{video_target_h}:force_original_aspect_ratio=decrease:force_divisible_by=2,pad={video_target_w}:{video_target_h}:(ow-iw)/2:(oh-ih)/2:color=white[scaled_video];"
-                    f"[with_header][scaled_video]overlay=0:{video_area_y}[with_video];"
-                    f"[2:v]scale={comment_max_w}:-1[comment];"
-                    f"[with_video][comment]overlay={comment_x}:{comment_y}[v]"
+        def render_main_piece(ss, t, out_path, job_log, progress=None):
+            """
+            Kaynak videonun ss..ss+t aralığını header + ölçekleme ile tek encode'da üretir
+            (ara main.mp4 yok; input seek ile kaynak bir kez decode edilir).
+            """
+            cmd = [ffmpeg, "-y", "-ss", str(ss), "-t", str(t), "-i", video_path, "-i", header_png]
+            if not has_audio:
+                cmd += ["-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo"]
+            cmd += [
+                "-filter_complex", piece_filter(t), "-map", "[v]", "-map", "[a]", "-t", str(t),
+            ] + _encode_args(x264_preset, crf, fps, audio) + [out_path]
+            if _run(cmd, log_cb=job_log, timeout=max(600, int(t * 20)), progress_cb=progress, cancel_event=abort) != 0 or not os.path.isfile(out_path):
+                if not abort.is_set():  # İptal / kardeş işin hatası: ayrıca hata yazma
+                    job_log("Hata: Ana video parçası oluşturulamadı.")
+                return False
+            return True
+
+        # Timeline: comment_1 + main[0:t1] + comment_2 + main[t1:t2] + ... + comment_N + main[tN-1:D]
+        # Yorumlar araya eklenir; video yorum sırasında duraklar, toplam süre D + (tüm yorum süreleri) olur.
+        # N == 1 ise tek parça: main[0:D]. İşler birbirinden bağımsız; concat sırası timeline sırasıdır.
+        concat_parts = []
+        jobs = []
+        layout_id = [video_target_w, video_target_h, video_area_y, comment_max_w, comment_x, comment_y]
+        for i in range(N):
+            name = "intro_0" if i == 0 else "seg_%d" % i
+            comment_mp4 = os.path.join(tmpdir, name + ".mp4")
+            concat_parts.append(comment_mp4)
+            comment_key = ArtifactCache.key(
+                "comment", CACHE_VERSION, src_id, 0.0 if i == 0 else t_list[i], D, header_key, enc_id, layout_id,
+                comment_filter(), still_encode_args(segment_durations[i][1])[1],
+                file_digest(comment_segments[i]["comment_image_path"]),
+                file_digest(segment_durations[i][0]), segment_durations[i][1],
+            )
+            prog = stage_progress(name, segment_durations[i][1])
+            inputs = [frame_paths[i], header_png, comment_segments[i]["comment_image_path"], segment_durations[i][0]]
+            jobs.append((name, lambda jl, i=i, p=comment_mp4, k=comment_key, pr=prog, n=name, inp=inputs: cached_stage(
+                k, p, lambda: render_comment(i, p, jl, pr), jl, pr, n, inp)))
+            start = t_list[i]
+            end = t_list[i + 1] if i + 1 < N else D
+            if end > start + 0.05:
+                name = "main_piece_%d" % i
+                piece = os.path.join(tmpdir, name + ".mp4")
+                concat_parts.append(piece)
+                piece_key = ArtifactCache.key(
+                    "piece", CACHE_VERSION, src_id, start, end, has_audio, header_key, enc_id, layout_id,
+                    piece_filter(end - start),
                 )
-                cmd_seg = [
-                    ffmpeg, "-y", "-loop", "1", "-i", frame_at, "-i", header_png, "-i", seg["comment_image_path"], "-i", tts_use,
-                    "-filter_complex", filter_seg, "-map", "[v]", "-map", "3:a", "-t", str(t_dur),
-                    "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-                    "-c:a", "aac", "-b:a", "256k", "-ar", "44100", "-ac", "2", "-shortest", seg_mp4,
-                ]
-                if _run(cmd_seg, log_cb=log, timeout=300) != 0:
-                    log("Hata: Yorum %d segmenti oluşturulamadı." % (idx + 1))
-                    return False
+                prog = stage_progress(name, end - start)
+                jobs.append((name, lambda jl, s=start, t=end - start, p=piece, k=piece_key, pr=prog, n=name: cached_stage(
+                    k, p, lambda: render_main_piece(s, t, p, jl, pr), jl, pr, n, [video_path, header_png])))
 
-            # Concat: comment_1 + main[0:t1] + comment_2 + main[t1:t2] + ... + comment_N + main[tN-1:D]
-            # Yorumlar araya eklenir; video yorum sırasında duraklar, toplam süre D + (tüm yorum süreleri) olur.
-            for i in range(N):
-                if i > 0:
-                    concat_parts.append(os.path.join(tmpdir, "seg_%d.mp4" % i))
-                start = t_list[i]
-                end = t_list[i + 1] if i + 1 < N else D
-                if end > start + 0.05:
-                    piece = os.path.join(tmpdir, "main_piece_%d.mp4" % i)
-                    if cut_main(start, end - start, piece):
-                        concat_parts.append(piece)
+        if not _run_jobs(jobs, max_workers, log, cancel_event=abort):
+            cancelled()
+            return False
+        if cache:
+            log("Önbellek: " + cache.stats())
 
         def path_for_concat(p):
             return p.replace("\\", "/").replace("'", "'\\''")
@@ -502,16 +1279,32 @@ def run_pipeline(
         if out_dir and not os.path.isdir(out_dir):
             os.makedirs(out_dir, exist_ok=True)
 
+        # Parçalar aynı parametrelerle encode edildi: yeniden encode etmeden birleştir
         cmd_concat = [
             ffmpeg, "-y", "-f", "concat", "-safe", "0", "-i", list_txt,
-            "-c:v", "libx264", "-preset", x264_preset, "-crf", str(crf), "-pix_fmt", "yuv420p", "-r", str(fps),
-            "-c:a", "aac", "-b:a", "256k", "-ar", "44100", "-ac", "2",
+            "-map", "0:v", "-map", "0:a", "-c", "copy", "-movflags", "+faststart",
             output_path,
         ]
-        if _run(cmd_concat, log_cb=log, timeout=300) != 0:
-            log("Hata: Birleştirme yapılamadı.")
-            return False
+        with tracer.stage("concat", inputs=concat_parts, outputs=[output_path]) as rec:
+            rec["reencode"] = False
+            if _run(cmd_concat, log_cb=log, timeout=300, cancel_event=abort) != 0:
+                if cancelled():
+                    rec["ok"] = False
+                    return False
+                # Beklenmedik uyumsuzlukta eski yol: yeniden encode ederek birleştir
+                log("Uyarı: -c copy birleştirme başarısız, yeniden encode ediliyor...")
+                rec["reencode"] = True
+                cmd_concat = [
+                    ffmpeg, "-y", "-f", "concat", "-safe", "0", "-i", list_txt,
+                ] + _encode_args(x264_preset, crf, fps, audio) + ["-movflags", "+faststart", output_path]
+                if _run(cmd_concat, log_cb=log, timeout=max(300, int(timeline_total[0] * 20)), cancel_event=abort) != 0:
+                    rec["ok"] = False
+                    cancelled()
+                    log("Hata: Birleştirme yapılamadı.")
+                    return False
 
+        if progress_cb:
+            progress_cb({"stage": "concat", "percent": 100.0, "speed": None, "eta": 0.0})
         log("Render tamamlandı: " + output_path)
         return True
     finally:
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""Başsız render servisi: yerel HTTP API ile iş kuyruğu, sıcak süreçte (önbellekler, ses kataloğu yüklü) çalışır.
+
+Örnek:
+    python -m src.server --port 8765 --workers 2
+
+    POST /jobs               gövde: toplu render satırıyla aynı JSON (bkz. src/batch.py) -> {"id": ...}
+    GET  /jobs               tüm işlerin durumu
+    GET  /jobs/<id>          durum, ilerleme, çıktı yolu, hata, aşama süreleri, son log satırları
+    POST /jobs/<id>/cancel   kuyruktaki işi iptal eder, çalışanın ffmpeg süreçlerini öldürür
+    GET  /health
+
+Varsayılan olarak yalnızca 127.0.0.1 dinlenir; API'de kimlik doğrulama yoktur.
+"""
+import json
+import time
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.config import load_channels, load_settings
+from src.batch import PipelinedExecutor, validate_job, DEFAULT_VOICE, DEFAULT_LOOKAHEAD, DEFAULT_PREP_WORKERS
+from src.voices import get_voices
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024
+MAX_FINISHED_JOBS = 500  # Bellekte tutulan biten iş sayısı (en eskiler atılır)
+LOG_TAIL_LINES = 200
+
+
+class JobManager:
+    """
+    İş kaydı + PipelinedExecutor (sıradaki işlerin indirme/TTS'i render sürerken yapılır).
+    Durumlar: queued, running, ok, failed, cancelled; running iken "stage": preparing / waiting / rendering.
+    """
+
+    def __init__(self, workers: int = 1, defaults: dict = None):
+        self.defaults = dict(defaults or {})
+        self._executor = PipelinedExecutor(
+            self.defaults, render_workers=max(1, workers),
+            prep_workers=int(self.defaults.get("prep_workers", DEFAULT_PREP_WORKERS)),
+            lookahead=int(self.defaults.get("lookahead", DEFAULT_LOOKAHEAD)),
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def submit(self, job: dict) -> dict:
+        """İşi doğrular ve kuyruğa ekler. Geçersizse ValueError."""
+        channels = load_channels()
+        job = dict(job)
+        err = validate_job(job, channels, self.defaults.get("voices"))
+        if err:
+            raise ValueError(err)
+        with self._lock:
+            job_id = str(self._next_id)
+            self._next_id += 1
+            job["_line"] = job_id
+            rec = {
+                "id": job_id,
+                "status": "queued",
+                "out": job.get("out"),
+                "error": None,
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "stage": None,
+                "progress": None,
+                "stages": {},
+                "_log": deque(maxlen=LOG_TAIL_LINES),
+                "_cancel": threading.Event(),
+            }
+            self._jobs[job_id] = rec
+            self._prune()
+        def progress(ev):
+            rec["progress"] = ev
+
+        fut = self._executor.submit(
+            job, channels, log_cb=rec["_log"].append, cancel_event=rec["_cancel"],
+            progress_cb=progress, state_cb=lambda stage: self._set_stage(rec, stage),
+        )
+        fut.add_done_callback(lambda f: self._done(rec, f.result()))
+        return self.public(rec)
+
+    def _set_stage(self, rec: dict, stage: str) -> None:
+        with self._lock:
+            if rec["status"] == "queued":
+                rec["status"] = "running"
+                rec["started"] = time.time()
+            rec["stage"] = stage
+
+    def _done(self, rec: dict, res: dict) -> None:
+        with self._lock:
+            rec["finished"] = time.time()
+            rec["stage"] = None
+            rec["stages"] = res.get("stages") or {}
+            rec["seconds"] = res.get("seconds")
+            if res["status"] == "ok":
+                rec["status"] = "ok"
+            else:
+                rec["status"] = "cancelled" if rec["_cancel"].is_set() else "failed"
+                rec["error"] = res.get("error")
+
+    def cancel(self, job_id: str) -> dict:
+        with self._lock:
+            rec = self._jobs.get(job_id)
+            if rec is None:
+                return None
+            rec["_cancel"].set()
+            if rec["status"] == "queued":
+                rec["status"] = "cancelled"
+                rec["finished"] = time.time()
+            return self.public(rec)
+
+    def get(self, job_id: str) -> dict:
+        with self._lock:
+            rec = self._jobs.get(job_id)
+            return self.public(rec, with_log=True) if rec else None
+
+    def list(self) -> list:
+        with self._lock:
+            return [self.public(r) for r in self._jobs.values()]
+
+    def shutdown(self) -> None:
+        """Bekleyen ve çalışan tüm işleri iptal eder, worker'ların bitmesini bekler."""
+        with self._lock:
+            for rec in self._jobs.values():
+                rec["_cancel"].set()
+        self._executor.shutdown(wait=True)
+
+    def _prune(self) -> None:
+        done = [r for r in self._jobs.values() if r["status"] in ("ok", "failed", "cancelled")]
+        for r in done[:max(0, len(done) - MAX_FINISHED_JOBS)]:
+            del self._jobs[r["id"]]
+
+    @staticmethod
+    def public(rec: dict, with_log: bool = False) -> dict:
+        out = {k: v for k, v in rec.items() if not k.startswith("_")}
+        if with_log:
+            out["log"] = list(rec["_log"])
+        return out
+
+
+class _Handler(BaseHTTPRequestHandler):
+    manager = None  # serve() atar
+    server_version = "AutoShorts"
+
+    def _send(self, code: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parts(self) -> list:
+        return [p for p in self.path.split("?", 1)[0].split("/") if p]
+
+    def do_GET(self):
+        parts = self._parts()
+        if parts == ["health"]:
+            self._send(200, {"status": "ok"})
+        elif parts == ["jobs"]:
+            self._send(200, self.manager.list())
+        elif len(parts) == 2 and parts[0] == "jobs":
+            rec = self.manager.get(parts[1])
+            if rec:
+                self._send(200, rec)
+            else:
+                self._send(404, {"error": "İş bulunamadı."})
+        else:
+            self._send(404, {"error": "Bilinmeyen yol."})
+
+    def do_POST(self):
+        parts = self._parts()
+        if parts == ["jobs"]:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length <= 0 or length > MAX_BODY_BYTES:
+                self._send(400, {"error": "Geçersiz gövde boyutu."})
+                return
+            try:
+                job = json.loads(self.rfile.read(length).decode("utf-8"))
+                if not isinstance(job, dict):
+                    raise ValueError("gövde bir JSON nesnesi değil")
+                self._send(202, self.manager.submit(job))
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:
+                # Beklenmedik hata bağlantıyı düşürmesin; istemci yine JSON yanıt alır
+                self._send(500, {"error": "Sunucu hatası: %s" % e})
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel":
+            rec = self.manager.cancel(parts[1])
+            if rec:
+                self._send(200, rec)
+            else:
+                self._send(404, {"error": "İş bulunamadı."})
+        else:
+            self._send(404, {"error": "Bilinmeyen yol."})
+
+    def log_message(self, format, *args):
+        print("[http] " + format % args)
+
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, workers: int = 1, defaults: dict = None) -> None:
+    """Sunucuyu başlatır, Ctrl+C ile işleri iptal edip kapanır."""
+    defaults = dict(defaults or {})
+    defaults.setdefault("voices", get_voices(max_age=float("inf")))
+    downloader_cfg = load_settings().get("downloader") or {}
+    defaults.setdefault("cookies_file", downloader_cfg.get("cookies_file", ""))
+    defaults.setdefault("offline", bool(downloader_cfg.get("offline", False)))
+    manager = JobManager(workers, defaults)
+    _Handler.manager = manager
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    print("AutoShorts render servisi: http://%s:%d (worker: %d)" % (host, port, workers))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("Kapanıyor, işler iptal ediliyor...")
+    finally:
+        httpd.server_close()
+        manager.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AutoShorts - başsız render servisi (yerel HTTP API)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Dinlenecek adres (varsayılan 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Eşzamanlı render sayısı")
+    parser.add_argument("--lookahead", type=int, default=DEFAULT_LOOKAHEAD, help="Render beklerken önceden hazırlanan (indirme + TTS) en fazla iş")
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="İşte 'voice' yoksa kullanılacak TTS sesi")
+    parser.add_argument("--render_mode", default="multi", choices=("multi", "single"))
+    parser.add_argument("--max_workers", type=int, default=1, help="İş başına eşzamanlı ffmpeg (multi mod)")
+    parser.add_argument("--no_cache", action="store_true", help="Ara dosya ve TTS önbelleğini kullanma")
+    parser.add_argument("--trace", default="", help="Tüm işlerin aşama kayıtlarını bu JSONL dosyasına ekle")
+    parser.add_argument("--offline", action="store_true", help="TikTok videolarını indirme, yalnızca kaynak kütüphanesini kullan")
+    args = parser.parse_args()
+    defaults = {
+        "voice": args.voice,
+        "render_mode": args.render_mode,
+        "max_workers": max(1, args.max_workers),
+        "use_cache": not args.no_cache,
+        "trace_path": args.trace,
+        "lookahead": max(0, args.lookahead),
+    }
+    if args.offline:
+        defaults["offline"] = True  # Yoksa settings.json → downloader.offline
+    serve(args.host, args.port, max(1, args.workers), defaults)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Aşama ölçümü: duvar/CPU süresi (alt süreçler dahil), girdi/çıktı boyutları, çalıştırılan komutlar; JSONL trace."""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+def _child_cpu() -> Optional[float]:
+    """
+    Beklenmiş alt süreçlerin toplam user+sys CPU süresi. Süreç geneli olduğundan yalnızca komut başına
+    rusage alınamadığında (wait4 yok) yedek olarak kullanılır.
+    """
+    if resource is None:
+        return None
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _sizes(paths) -> dict:
+    sizes = {}
+    for p in paths or ():
+        if p:
+            try:
+                sizes[p] = os.path.getsize(p)
+            except OSError:
+                sizes[p] = None
+    return sizes
+
+
+def record_command(argv: list) -> Optional[dict]:
+    """
+    Bu thread'de açık aşama varsa komutu kaydın "commands" listesine ekler ve girdiyi döner (yoksa None).
+    _run her komut için çağırır; bitince girdiye rc, wall_sec, cpu_sec, max_rss_mb yazar.
+    """
+    rec = getattr(_local, "record", None)
+    if rec is None:
+        return None
+    entry = {"argv": list(argv)}
+    rec["commands"].append(entry)
+    return entry
+
+
+class Tracer:
+    """
+    stage() ile sarılan her aşama bir kayıt olur; path verilirse kayıt biter bitmez JSONL satırı olarak eklenir.
+    context (ör. {"job": 3}) her kayda eklenir. Thread-safe: paralel işler kendi thread'lerinde aşama açar.
+    """
+
+    def __init__(self, path: Optional[str] = None, context: Optional[dict] = None):
+        self.path = path
+        self.context = dict(context or {})
+        self.records = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        if path:
+            d = os.path.dirname(path)
+            if d:
+                os.makedirs(d, exist_ok=True)
+
+    @contextmanager
+    def stage(self, name: str, inputs=(), outputs=(), **extra):
+        """
+        Kayıt: stage, start (tracer başından sn), wall_sec, cpu_sec (bu süreç, tüm thread'ler), child_cpu_sec
+        (aşamanın komutları), input_bytes, output_bytes, commands, ok ve extra alanlar. Blok içinde kayda alan
+        eklenebilir.
+        """
+        rec = dict(self.context)
+        rec.update({"stage": name, "start": round(time.perf_counter() - self._t0, 4), "commands": [], "ok": True})
+        rec.update(extra)
+        rec["input_bytes"] = _sizes(inputs)
+        prev = getattr(_local, "record", None)
+        _local.record = rec
+        wall0, cpu0, child0 = time.perf_counter(), time.process_time(), _child_cpu()
+        try:
+            yield rec
+        except BaseException:
+            rec["ok"] = False
+            raise
+        finally:
+            _local.record = prev
+            rec["wall_sec"] = round(time.perf_counter() - wall0, 4)
+            rec["cpu_sec"] = round(time.process_time() - cpu0, 4)
+            cmd_cpu = [c.get("cpu_sec") for c in rec["commands"]]
+            if cmd_cpu and all(c is not None for c in cmd_cpu):
+                rec["child_cpu_sec"] = round(sum(cmd_cpu), 4)
+            else:
+                child1 = _child_cpu()
+                rec["child_cpu_sec"] = round(child1 - child0, 4) if child0 is not None else None
+            rec["output_bytes"] = _sizes(outputs)
+            self._add(rec)
+
+    def event(self, name: str, **fields) -> dict:
+        """Süresiz kayıt (ör. pipeline sonucu)."""
+        rec = dict(self.context)
+        rec.update({"stage": name, "start": round(time.perf_counter() - self._t0, 4)})
+        rec.update(fields)
+        self._add(rec)
+        return rec
+
+    def _add(self, rec: dict) -> None:
+        with self._lock:
+            self.records.append(rec)
+        if self.path:
+            line = json.dumps(rec, ensure_ascii=False, default=str)
+            with _file_lock:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(line + "\n")
+                except OSError:
+                    pass
+
+    def summary(self) -> dict:
+        """Aşama adı -> toplam wall_sec (aynı adlı kayıtlar toplanır)."""
+        out = {}
+        with self._lock:
+            for r in self.records:
+                if "wall_sec" in r:
+                    out[r["stage"]] = round(out.get(r["stage"], 0.0) + r["wall_sec"], 4)
+        return out
+
@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
-"""TTS modülü: edge-tts ile metin -> ses, süre ölçümü."""
-import asyncio
-import edge_tts
+"""TTS modülü: edge-tts ile metin -> ses, süre ölçümü, disk önbelleği."""
 import os
 import sys
 import subprocess
+import threading
+from typing import Optional, Callable
+
+from src.cache import ArtifactCache, CACHE_DIR, CACHE_VERSION
+from src.config import load_settings
+
+DEFAULT_TTS_CACHE_MB = 512
 
 
 def get_app_dir():
@@ -23,8 +28,120 @@ def get_ffprobe():
     return "ffprobe"
 
 
-def get_audio_duration_seconds(audio_path: str) -> float:
-    """MP3/WAV süresini saniye cinsinden döndür (ffprobe)."""
+# MPEG audio başlık tabloları (kbps): [sürüm V1/V2][katman]
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 25: (11025, 12000, 8000)}
+
+
+def _mp3_frame(data: bytes, pos: int):
+    """pos'taki MPEG audio frame başlığını çözer: (frame_uzunluğu, örnek/frame, örnekleme, sürüm, mono) veya None."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    version = {0: 25, 2: 2, 3: 1}.get((b1 >> 3) & 0x03)
+    layer = {1: 3, 2: 2, 3: 1}.get((b1 >> 1) & 0x03)
+    br_idx = (b2 >> 4) & 0x0F
+    sr_idx = (b2 >> 2) & 0x03
+    if version is None or layer is None or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][br_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][sr_idx]
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        spf = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        spf = 576 if (layer == 3 and version != 1) else 1152
+        length = (spf // 8) * bitrate // sample_rate + padding
+    mono = ((b3 >> 6) & 0x03) == 3
+    return length, spf, sample_rate, version, mono
+
+
+def _mp3_duration(data: bytes) -> float:
+    """MP3 süresi: ID3v2 atlanır; Xing/Info veya VBRI başlığındaki frame sayısı, yoksa frame sayımı."""
+    pos = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+
+    # İlk geçerli frame: ardından gelen frame de geçerli olmalı (yanlış sync'e karşı)
+    first = None
+    limit = min(len(data), pos + 64 * 1024)
+    while pos < limit:
+        hdr = _mp3_frame(data, pos)
+        if hdr and hdr[0] > 0:
+            nxt = pos + hdr[0]
+            if nxt >= len(data) or _mp3_frame(data, nxt):
+                first = hdr
+                break
+        pos += 1
+    if not first:
+        return 0.0
+    length, spf, sample_rate, version, mono = first
+
+    side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+    xing = pos + 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 0x01:
+            frames = int.from_bytes(data[xing + 8:xing + 12], "big")
+            return frames * spf / float(sample_rate)
+    vbri = pos + 4 + 32
+    if data[vbri:vbri + 4] == b"VBRI":
+        frames = int.from_bytes(data[vbri + 14:vbri + 18], "big")
+        return frames * spf / float(sample_rate)
+
+    # CBR (edge-tts: 24 kHz mono MPEG-2 Layer III): frame'leri say
+    samples = 0
+    while True:
+        hdr = _mp3_frame(data, pos)
+        if not hdr or hdr[0] <= 0 or pos + hdr[0] > len(data):
+            break
+        samples += hdr[1]
+        pos += hdr[0]
+    return samples / float(sample_rate)
+
+
+def _wav_duration(data: bytes) -> float:
+    """RIFF/WAVE: fmt chunk'ındaki byte_rate ve data chunk boyutundan süre."""
+    pos = 12
+    byte_rate = 0
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        size = int.from_bytes(data[pos + 4:pos + 8], "little")
+        if chunk_id == b"fmt " and size >= 16:
+            byte_rate = int.from_bytes(data[pos + 16:pos + 20], "little")
+        elif chunk_id == b"data":
+            if size == 0xFFFFFFFF or pos + 8 + size > len(data):
+                size = len(data) - pos - 8  # Akış (streaming) yazımı: boyut bilinmiyor
+            return size / float(byte_rate) if byte_rate else 0.0
+        pos += 8 + size + (size & 1)
+    return 0.0
+
+
+def read_audio_duration(audio_path: str) -> float:
+    """ffprobe'suz süre ölçümü (MP3 frame başlıkları / WAV RIFF başlığı). Çözülemezse 0.0."""
+    try:
+        with open(audio_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return 0.0
+    try:
+        if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+            return _wav_duration(data)
+        return _mp3_duration(data)
+    except Exception:
+        return 0.0
+
+
+def _ffprobe_duration(audio_path: str) -> float:
     ffprobe = get_ffprobe()
     cmd = [
         ffprobe,
@@ -40,21 +157,143 @@ def get_audio_duration_seconds(audio_path: str) -> float:
         return 0.0
 
 
+def get_audio_duration_seconds(audio_path: str) -> float:
+    """MP3/WAV süresini saniye cinsinden döndür (önce saf Python başlık okuma, gerekirse ffprobe)."""
+    return read_audio_duration(audio_path) or _ffprobe_duration(audio_path)
+
+
 async def generate_tts_async(text: str, voice: str, output_path: str) -> None:
     """Metni ses dosyasına yazar."""
+    import edge_tts  # Yalnızca ses üretiminde gerekli (render/benchmark edge-tts olmadan çalışır)
     communicate = edge_tts.Communicate(text, voice)
     await communicate.save(output_path)
 
 
-def generate_tts(text: str, voice: str, output_path: str) -> float:
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> ArtifactCache:
+    """TTS sesleri için paylaşılan önbellek (<app_dir>/cache/tts, settings: cache.tts_max_mb)."""
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            cfg = load_settings().get("cache") or {}
+            max_mb = int(cfg.get("tts_max_mb", DEFAULT_TTS_CACHE_MB))
+            _tts_cache = ArtifactCache(os.path.join(get_app_dir(), CACHE_DIR, "tts"), max_mb * 1024 * 1024)
+        return _tts_cache
+
+
+def normalize_text(text: str) -> str:
+    """Önbellek anahtarı ve sentez için: baştaki/sondaki ve tekrarlanan boşluklar tek boşluğa indirgenir."""
+    return " ".join((text or "").split())
+
+
+def _tts_key(text: str, voice: str) -> str:
+    return ArtifactCache.key("tts", CACHE_VERSION, normalize_text(text), voice)
+
+
+async def _generate_one(text, voice, output_path, sem, retries, cache, log_cb):
+    """Tek öğe: önbellek → (semafor altında) sentez + yeniden deneme → süre ölçümü. (yol, süre) döner; hata: süre 0.0."""
+    def log(s):
+        if log_cb:
+            log_cb(s)
+
+    import asyncio
+    key = _tts_key(text, voice)
+    if cache:
+        meta = cache.fetch(key, output_path)
+        if meta and meta.get("duration", 0) > 0:
+            log("TTS önbellekten: %s (%s)" % (os.path.basename(output_path), cache.stats()))
+            return output_path, float(meta["duration"])
+
+    async with sem:
+        for attempt in range(retries + 1):
+            try:
+                await generate_tts_async(normalize_text(text), voice, output_path)
+                break
+            except Exception as e:
+                if attempt >= retries:
+                    log("TTS hatası (%s): %s" % (os.path.basename(output_path), e))
+                    return output_path, 0.0
+                log("TTS tekrar deneniyor (%d/%d): %s" % (attempt + 1, retries, e))
+                await asyncio.sleep(0.5 * (2 ** attempt))
+
+    loop = asyncio.get_running_loop()
+    duration = await loop.run_in_executor(None, get_audio_duration_seconds, output_path)
+    if cache and duration > 0:
+        cache.store(key, output_path, {"duration": duration})
+        log("TTS üretildi: %s (%s)" % (os.path.basename(output_path), cache.stats()))
+    return output_path, duration
+
+
+async def generate_tts_many_async(
+    items: list,
+    max_concurrency: int = 3,
+    retries: int = 2,
+    use_cache: bool = True,
+    log_cb: Optional[Callable[[str], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> list:
     """
-    TTS üretir, dosyaya yazar, süreyi (saniye) döndürür.
-    voice örn: tr-TR-EmelNeural
+    items: [(metin, ses, çıktı_yolu), ...] → [(çıktı_yolu, süre_sn), ...] (aynı sırada).
+    cancel_event set edilirse süren istekler iptal edilir, tüm öğeler süre 0.0 ile döner.
+    """
+    import asyncio
+    cache = get_tts_cache() if use_cache else None
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    batch = asyncio.gather(*(
+        _generate_one(text, voice, path, sem, retries, cache, log_cb) for text, voice, path in items
+    ))
+    if cancel_event is None:
+        return list(await batch)
+    while not batch.done():
+        if cancel_event.is_set():
+            batch.cancel()
+            try:
+                await batch
+            except asyncio.CancelledError:
+                pass
+            if log_cb:
+                log_cb("TTS iptal edildi.")
+            return [(path, 0.0) for _, _, path in items]
+        await asyncio.wait({batch}, timeout=0.1)
+    return list(batch.result())
+
+
+def generate_tts_many(
+    items: list,
+    max_concurrency: int = 3,
+    retries: int = 2,
+    use_cache: bool = True,
+    log_cb: Optional[Callable[[str], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+) -> list:
+    """
+    Tüm yorumların TTS'ini tek event loop'ta eşzamanlı üretir (en fazla max_concurrency istek,
+    öğe başına retries kez yeniden deneme). [(çıktı_yolu, süre_sn), ...] döner; başarısız öğede süre 0.0.
+    cancel_event set edilirse (ör. GUI İptal, Ctrl+C) süren istekler kesilir, tüm süreler 0.0 döner.
     """
+    import asyncio  # Başlangıçta yüklenmez (CLI --help / doğrulama hızlı kalsın)
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
-        loop.run_until_complete(generate_tts_async(text, voice, output_path))
-        return get_audio_duration_seconds(output_path)
+        return loop.run_until_complete(generate_tts_many_async(
+            items, max_concurrency, retries, use_cache, log_cb, cancel_event))
     finally:
         loop.close()
+
+
+def generate_tts(
+    text: str,
+    voice: str,
+    output_path: str,
+    use_cache: bool = True,
+    log_cb: Optional[Callable[[str], None]] = None,
+) -> float:
+    """
+    TTS üretir, dosyaya yazar, süreyi (saniye) döndürür.
+    voice örn: tr-TR-EmelNeural
+    use_cache: aynı (metin, ses) daha önce üretildiyse MP3 ve süresi önbellekten gelir (ağ ve ffprobe yok).
+    """
+    return generate_tts_many([(text, voice, output_path)], use_cache=use_cache, log_cb=log_cb)[0][1]
@@ -2,7 +2,6 @@
 """AutoShorts GUI: dosya seçiciler, metin alanları, Başlat butonu, log."""
 import os
 import sys
-import json
 import threading
 import tempfile
 import tkinter as tk
@@ -12,208 +11,19 @@ from tkinter import ttk, filedialog, messagebox, scrolledtext
 if __name__ == "__main__":
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.tts import generate_tts, get_audio_duration_seconds
+from src.tts import generate_tts_many
 from src.render import run_pipeline, get_video_info, get_ffmpeg
+from src.config import get_app_dir, load_channels, save_channels, load_settings, save_settings
+from src.download import download_tiktok_video
+from src.folder_index import get_folder_index
+from src.voices import load_cached_voices, refresh_voices_async, voice_names, VOICES_TTL_SEC
+from src.logsink import LogSink, DEFAULT_MAX_LINES, DEFAULT_FILE_MAX_MB
+from src.trace import Tracer
 
-
-def get_app_dir():
-    if getattr(sys, "frozen", False):
-        return os.path.dirname(sys.executable)
-    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-
-CHANNELS_FILE = "channels.json"
-SETTINGS_FILE = "settings.json"
-
-
-def _channels_path():
-    return os.path.join(get_app_dir(), CHANNELS_FILE)
-
-
-def _settings_path():
-    return os.path.join(get_app_dir(), SETTINGS_FILE)
-
-
-def load_channels():
-    path = _channels_path()
-    if not os.path.isfile(path):
-        return []
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-
-def save_channels(channels):
-    path = _channels_path()
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(channels, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-
-def load_settings():
-    path = _settings_path()
-    if not os.path.isfile(path):
-        return {}
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-
-def save_settings(settings: dict):
-    path = _settings_path()
-    try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(settings, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
-
-def download_tiktok_video(url: str, out_dir: str, cookies_file: str = "", log_cb=None) -> str:
-    """yt-dlp ile TikTok URL'den video indirir. İndirilen dosya yolunu döner, hata durumunda None."""
-    try:
-        import yt_dlp
-    except ImportError:
-        if log_cb:
-            log_cb("yt-dlp yüklü değil. pip install yt-dlp")
-        return None
-    
-    # Chrome açık mı kontrol et (Windows)
-    chrome_running = False
-    if sys.platform == "win32":
-        try:
-            import subprocess
-            result = subprocess.run(["tasklist", "/FI", "IMAGENAME eq chrome.exe"], 
-                                 capture_output=True, text=True, timeout=2)
-            chrome_running = "chrome.exe" in result.stdout
-        except Exception:
-            pass
-    
-    out_tmpl = os.path.join(out_dir, "tiktok_dl.%(ext)s")
-    opts = {
-        "outtmpl": out_tmpl,
-        # TikTok: HEVC + sessiz video yerine, AVC + m4a ses tercih et
-        # Örnek: bv*[vcodec^=avc]+ba[ext=m4a]/b[ext=mp4]/b
-        "format": "bv*[vcodec^=avc]+ba[ext=m4a]/b[ext=mp4]/b",
-        "quiet": False,  # Hata mesajlarını görmek için False
-        "no_warnings": False,
-        "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "referer": "https://www.tiktok.com/",
-        "extractor_args": {
-            "tiktok": {
-                "webpage_download": True,
-            }
-        },
-    }
-
-    # yt-dlp'nin, uygulama ile gelen ffmpeg'i kullanabilmesi için
-    try:
-        ffmpeg_bin = get_ffmpeg()
-        # get_ffmpeg tam yol döndürüyor ise dizinini ver
-        if os.path.isabs(ffmpeg_bin):
-            opts["ffmpeg_location"] = os.path.dirname(ffmpeg_bin)
-    except Exception:
-        pass
-    
-    # Öncelik: cookies.txt varsa onu kullan
-    if cookies_file and os.path.isfile(cookies_file):
-        if log_cb:
-            log_cb(f"Cookies.txt kullanılıyor: {cookies_file}")
-        # Cookies.txt formatını kontrol et ve gerekirse dönüştür
-        try:
-            with open(cookies_file, "r", encoding="utf-8") as f:
-                content = f.read().strip()
-                # JSON formatında mı kontrol et
-                if content.startswith("[") or content.startswith("{"):
-                    if log_cb:
-                        log_cb("JSON formatı tespit edildi, Netscape formatına dönüştürülüyor...")
-                    # JSON'u Netscape formatına dönüştür
-                    try:
-                        cookies_json = json.loads(content)
-                        # Liste değilse liste yap
-                        if isinstance(cookies_json, dict):
-                            cookies_json = [cookies_json]
-                        elif not isinstance(cookies_json, list):
-                            cookies_json = []
-                        # Geçici Netscape format dosyası oluştur
-                        netscape_file = os.path.join(out_dir, "cookies_netscape.txt")
-                        with open(netscape_file, "w", encoding="utf-8") as nf:
-                            nf.write("# Netscape HTTP Cookie File\n")
-                            nf.write("# This file was generated from JSON format\n\n")
-                            for cookie in cookies_json:
-                                domain = cookie.get("domain", "").strip()
-                                if not domain:
-                                    continue
-                                # Netscape format: domain, includeSubdomains, path, secure, expiration, name, value
-                                include_sub = "TRUE" if domain.startswith(".") else "FALSE"
-                                path = cookie.get("path", "/")
-                                secure = "TRUE" if cookie.get("secure", False) else "FALSE"
-                                exp = int(cookie.get("expirationDate", 0)) if cookie.get("expirationDate") else 0
-                                name = cookie.get("name", "")
-                                value = cookie.get("value", "")
-                                if name and value:
-                                    nf.write(f"{domain}\t{include_sub}\t{path}\t{secure}\t{exp}\t{name}\t{value}\n")
-                        opts["cookiefile"] = netscape_file
-                        if log_cb:
-                            log_cb(f"Netscape formatına dönüştürüldü: {netscape_file}")
-                    except Exception as e:
-                        if log_cb:
-                            log_cb(f"JSON dönüştürme hatası: {e}")
-                        opts["cookiefile"] = cookies_file
-                else:
-                    # Zaten Netscape formatı
-                    if "tiktok.com" in content.lower() or "sessionid" in content.lower():
-                        if log_cb:
-                            log_cb("Cookies.txt TikTok cookie'leri içeriyor.")
-                    opts["cookiefile"] = cookies_file
-        except Exception as e:
-            if log_cb:
-                log_cb(f"Cookies.txt okunamadı: {e}")
-            opts["cookiefile"] = cookies_file
-    elif not chrome_running:
-        # Chrome kapalı, cookie'leri çekebiliriz
-        if log_cb:
-            log_cb("Chrome'dan cookie çekiliyor...")
-        opts["cookiesfrombrowser"] = ("chrome",)
-    else:
-        # Chrome açık ve cookies.txt yok
-        if log_cb:
-            log_cb("UYARI: Chrome açık ve cookies.txt yok. Cookie olmadan deneniyor...")
-    
-    # TikTok için ekstra ayarlar
-    try:
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            if log_cb:
-                log_cb(f"İndirme başlatılıyor: {url}")
-            ydl.download([url])
-        # İndirilen dosyayı bul
-        for f in os.listdir(out_dir):
-            if f.startswith("tiktok_dl.") and f.lower().endswith((".mp4", ".webm", ".mov")):
-                path = os.path.join(out_dir, f)
-                if log_cb:
-                    log_cb(f"İndirme tamamlandı: {path}")
-                return path
-        if log_cb:
-            log_cb("HATA: İndirilen dosya bulunamadı.")
-        return None
-    except Exception as e:
-        err_msg = str(e)
-        if log_cb:
-            log_cb(f"İndirme hatası: {err_msg}")
-            # TikTok özel hatalar
-            if "sign in" in err_msg.lower() or "login" in err_msg.lower():
-                log_cb("TikTok giriş gerektiriyor. cookies.txt dosyanızı kontrol edin.")
-                log_cb("Cookies.txt'de 'sessionid' cookie'si olmalı.")
-            elif "cookie" in err_msg.lower():
-                log_cb("Cookie hatası. cookies.txt formatını kontrol edin (Netscape formatı).")
-            elif "unavailable" in err_msg.lower() or "private" in err_msg.lower():
-                log_cb("Video erişilemez veya özel. Giriş yapmış cookies.txt kullanın.")
-        return None
+# Log kuyruğu bu aralıkla (ms) toplu olarak widget'a aktarılır
+LOG_DRAIN_MS = 100
+VIDEO_EXTS = (".mp4", ".mov")  # Otomatik video seçimi
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")  # Otomatik görsel seçimi
 
 
 class VideoFactoryUI:
@@ -224,7 +34,7 @@ class VideoFactoryUI:
         self.root.minsize(580, 660)
         self.app_dir = get_app_dir()
         self.default_out = os.path.join(self.app_dir, "output")
-        self._abort = False
+        self._cancel_event = None  # Çalışan render'ın iptal event'i
         self._channels = load_channels()
         self._settings = load_settings()
         default_video = os.path.join(os.path.expanduser("~"), "Downloads")
@@ -236,16 +46,25 @@ class VideoFactoryUI:
         self.use_tiktok_url = bool(self._settings.get("use_tiktok_url", False))
         self.quality_resolution = self._settings.get("quality_resolution", "1080p")
         self.quality_fps = self._settings.get("quality_fps", "30")
+        self.render_mode = self._settings.get("render_mode", "multi")
+        self.max_workers = max(1, int(self._settings.get("max_workers", 1)))
+        self.use_cache = bool((self._settings.get("cache") or {}).get("enabled", True))
         self.cookies_file = (self._settings.get("downloader") or {}).get("cookies_file", "")
+        self.offline = bool((self._settings.get("downloader") or {}).get("offline", False))
         self.comment_count = max(1, min(3, int(self._settings.get("comment_count", 1))))
         layout_cfg = self._settings.get("layout", {})
         self.post_text = layout_cfg.get("post_text", "")
         self.avatar_size_ratio = float(layout_cfg.get("avatar_size_ratio", 0.70))
         self.header_padding_ratio = float(layout_cfg.get("header_padding_ratio", 0.04))
         self.comment_text_size_ratio = float(layout_cfg.get("comment_text_size_ratio", 0.95))
+        log_cfg = self._settings.get("log") or {}
+        self._log_sink = LogSink(int(log_cfg.get("max_lines", DEFAULT_MAX_LINES)))
+        self.log_to_file = bool(log_cfg.get("to_file", False))
+        self.log_file_max_mb = float(log_cfg.get("file_max_mb", DEFAULT_FILE_MAX_MB))
         self._apply_theme()
         self.setup_ui()
         self._refresh_channel_list()
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
 
     def _apply_theme(self):
         style = ttk.Style()
@@ -405,19 +224,29 @@ class VideoFactoryUI:
         # — Başlat + Log —
         action_frame = ttk.Frame(parent)
         action_frame.grid(row=row, column=0, sticky="ew", pady=(0, 4))
-        action_frame.columnconfigure(1, weight=1)
+        action_frame.columnconfigure(2, weight=1)
         row += 1
 
         self.out_var = tk.StringVar(value=os.path.join(self.default_out, "output.mp4"))
 
         self.render_btn = ttk.Button(action_frame, text="Videoyu Oluştur", command=self.do_render, style="Accent.TButton", width=18)
         self.render_btn.grid(row=0, column=0, padx=(0, 8))
+        self.cancel_btn = ttk.Button(action_frame, text="İptal", command=self.cancel_render, width=8, state=tk.DISABLED)
+        self.cancel_btn.grid(row=0, column=1, padx=(0, 8))
         f_out = ttk.Frame(action_frame)
-        f_out.grid(row=0, column=1, sticky="ew")
+        f_out.grid(row=0, column=2, sticky="ew")
         f_out.columnconfigure(0, weight=1)
         ttk.Entry(f_out, textvariable=self.out_var, font=("Segoe UI", 8)).grid(row=0, column=0, sticky="ew", padx=(0, 4))
         ttk.Button(f_out, text="...", command=self._out_file, width=3).grid(row=0, column=1)
 
+        # İlerleme: run_pipeline progress_cb olayları (yüzde, aşama, hız, kalan süre)
+        self.progress_var = tk.DoubleVar(value=0.0)
+        self.progress_label_var = tk.StringVar(value="")
+        ttk.Progressbar(action_frame, variable=self.progress_var, maximum=100.0, mode="determinate").grid(
+            row=1, column=0, columnspan=3, sticky="ew", pady=(4, 0))
+        ttk.Label(action_frame, textvariable=self.progress_label_var, font=("Segoe UI", 8)).grid(
+            row=2, column=0, columnspan=3, sticky="w")
+
         self.log_text = scrolledtext.ScrolledText(parent, height=10, wrap=tk.WORD, font=("Consolas", 8), bg="#1e1e1e", fg="#d4d4d4", insertbackground="#fff")
         self.log_text.grid(row=row, column=0, sticky="nsew", pady=(0, 0))
         parent.rowconfigure(row, weight=1)
@@ -434,8 +263,9 @@ class VideoFactoryUI:
 
         ttk.Label(q_frame, text="Çözünürlük:").grid(row=0, column=0, sticky="w", padx=(0, 6))
         self.quality_resolution_var = tk.StringVar(value=self.quality_resolution)
-        res_combo = ttk.Combobox(q_frame, textvariable=self.quality_resolution_var, values=("720p", "1080p"), width=8, state="readonly")
+        res_combo = ttk.Combobox(q_frame, textvariable=self.quality_resolution_var, values=("draft", "720p", "1080p"), width=8, state="readonly")
         res_combo.grid(row=0, column=1, sticky="w")
+        ttk.Label(q_frame, text="draft: 360p hızlı önizleme (TASLAK etiketli)", foreground="gray").grid(row=0, column=2, sticky="w", padx=(8, 0))
         res_combo.bind("<<ComboboxSelected>>", lambda e: self._save_quality_settings())
 
         ttk.Label(q_frame, text="FPS:").grid(row=1, column=0, sticky="w", padx=(0, 6), pady=(4, 0))
@@ -444,6 +274,25 @@ class VideoFactoryUI:
         fps_combo.grid(row=1, column=1, sticky="w", pady=(4, 0))
         fps_combo.bind("<<ComboboxSelected>>", lambda e: self._save_quality_settings())
 
+        ttk.Label(q_frame, text="Render modu:").grid(row=2, column=0, sticky="w", padx=(0, 6), pady=(4, 0))
+        self.render_mode_var = tk.StringVar(value=self.render_mode)
+        mode_combo = ttk.Combobox(q_frame, textvariable=self.render_mode_var, values=("multi", "single"), width=8, state="readonly")
+        mode_combo.grid(row=2, column=1, sticky="w", pady=(4, 0))
+        mode_combo.bind("<<ComboboxSelected>>", lambda e: self._save_quality_settings())
+
+        ttk.Label(q_frame, text="Paralel iş:").grid(row=3, column=0, sticky="w", padx=(0, 6), pady=(4, 0))
+        self.max_workers_var = tk.IntVar(value=self.max_workers)
+        workers_sp = ttk.Spinbox(q_frame, from_=1, to=max(1, os.cpu_count() or 1), textvariable=self.max_workers_var, width=8)
+        workers_sp.grid(row=3, column=1, sticky="w", pady=(4, 0))
+        workers_sp.bind("<FocusOut>", lambda e: self._save_quality_settings())
+        workers_sp.bind("<<Increment>>", lambda e: self.root.after_idle(self._save_quality_settings))
+        workers_sp.bind("<<Decrement>>", lambda e: self.root.after_idle(self._save_quality_settings))
+
+        self.use_cache_var = tk.BooleanVar(value=self.use_cache)
+        ttk.Checkbutton(q_frame, text="Ara dosya ve TTS önbelleği (tekrar render hızlanır)", variable=self.use_cache_var, command=self._save_quality_settings).grid(row=4, column=0, columnspan=2, sticky="w", pady=(4, 0))
+        self.log_to_file_var = tk.BooleanVar(value=self.log_to_file)
+        ttk.Checkbutton(q_frame, text="Her render için log dosyası yaz (logs/)", variable=self.log_to_file_var, command=self._save_quality_settings).grid(row=5, column=0, columnspan=2, sticky="w", pady=(4, 0))
+
         # — Layout —
         l_frame = ttk.LabelFrame(parent, text="Layout", padding="8")
         l_frame.grid(row=row, column=0, sticky="ew", pady=(0, 8))
@@ -499,6 +348,8 @@ class VideoFactoryUI:
         f_ck.columnconfigure(0, weight=1)
         ttk.Entry(f_ck, textvariable=self.cookies_var).grid(row=0, column=0, sticky="ew", padx=(0, 4))
         ttk.Button(f_ck, text="...", command=self._choose_cookies, width=3).grid(row=0, column=1)
+        self.offline_var = tk.BooleanVar(value=self.offline)
+        ttk.Checkbutton(c_frame, text="Çevrimdışı: yalnızca kaynak kütüphanesindeki (daha önce indirilen) videolar", variable=self.offline_var, command=self._save_offline).grid(row=1, column=0, columnspan=2, sticky="w", pady=(4, 0))
 
     def _refresh_channel_list(self):
         self._channels = load_channels()
@@ -632,8 +483,19 @@ class VideoFactoryUI:
     def _save_quality_settings(self):
         self.quality_resolution = self.quality_resolution_var.get()
         self.quality_fps = self.quality_fps_var.get()
+        self.render_mode = self.render_mode_var.get()
+        try:
+            self.max_workers = max(1, int(self.max_workers_var.get()))
+        except (ValueError, TypeError, tk.TclError):
+            self.max_workers = 1
         self._settings["quality_resolution"] = self.quality_resolution
         self._settings["quality_fps"] = self.quality_fps
+        self._settings["render_mode"] = self.render_mode
+        self._settings["max_workers"] = self.max_workers
+        self.use_cache = self.use_cache_var.get()
+        self._settings.setdefault("cache", {})["enabled"] = self.use_cache
+        self.log_to_file = self.log_to_file_var.get()
+        self._settings.setdefault("log", {})["to_file"] = self.log_to_file
         save_settings(self._settings)
 
     def _save_layout_settings(self):
@@ -658,6 +520,11 @@ class VideoFactoryUI:
             self._settings.setdefault("downloader", {})["cookies_file"] = path
             save_settings(self._settings)
 
+    def _save_offline(self):
+        self.offline = self.offline_var.get()
+        self._settings.setdefault("downloader", {})["offline"] = self.offline
+        save_settings(self._settings)
+
     def _choose_video_folder(self):
         path = filedialog.askdirectory(title="Video klasörünü seç (indirilen videolar)")
         if path:
@@ -677,37 +544,13 @@ class VideoFactoryUI:
     def _auto_pick_media(self):
         """Otomatik video (dosya modunda) ve otomatik görsel: N en son görsel (N = yorum sayısı)."""
         def latest_videos(folder, limit=1):
-            if not folder or not os.path.isdir(folder):
-                return []
-            exts = [".mp4", ".mov"]
-            candidates = []
-            try:
-                for entry in os.scandir(folder):
-                    if not entry.is_file():
-                        continue
-                    if entry.name.lower().endswith(tuple(exts)):
-                        candidates.append((entry.stat().st_mtime, entry.path))
-                candidates.sort(key=lambda x: -x[0])
-                return [p for (_, p) in candidates[:limit]]
-            except Exception:
-                return []
+            index = get_folder_index(folder, VIDEO_EXTS)
+            return index.newest(limit) if index else []
 
         def latest_images_sorted(folder, limit):
             """En son eklenen N görseli getirir (mtime en büyük = en yeni). Sıra: [en_yeni, ..., en_eski_olan_N]."""
-            if not folder or not os.path.isdir(folder):
-                return []
-            exts = [".png", ".jpg", ".jpeg"]
-            candidates = []
-            try:
-                for entry in os.scandir(folder):
-                    if not entry.is_file():
-                        continue
-                    if entry.name.lower().endswith(tuple(exts)):
-                        candidates.append((entry.stat().st_mtime, entry.path))
-                candidates.sort(key=lambda x: -x[0])
-                return [p for (_, p) in candidates[:limit]]
-            except Exception:
-                return []
+            index = get_folder_index(folder, IMAGE_EXTS)
+            return index.newest(limit) if index else []
 
         use_url = self.use_tiktok_url_var.get()
         if not use_url and self.auto_video_var.get():
@@ -746,29 +589,54 @@ class VideoFactoryUI:
             self.out_var.set(path)
 
     def _load_voices(self):
-        def load():
-            try:
-                import asyncio
-                import edge_tts
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                voices = loop.run_until_complete(edge_tts.list_voices())
-                loop.close()
-                tr = [v for v in voices if v["Locale"].startswith("tr-TR")]
-                names = [f"{v['ShortName']} ({v['Gender']})" for v in tr]
-                # Varsayılan: erkek sesi (Ahmet) varsa onu seç, yoksa ilk Türkçe ses
-                default_voice = next((v["ShortName"] for v in tr if "Ahmet" in v.get("ShortName", "")), tr[0]["ShortName"] if tr else None)
-                self.root.after(0, lambda: self.voice_combo.config(values=names))
-                if default_voice:
-                    self.root.after(0, lambda: self.voice_var.set(default_voice))
-            except Exception:
-                pass
-        threading.Thread(target=load, daemon=True).start()
+        """Combobox önce disk önbelleğinden (voices.json) doldurulur; eskiyse arka planda yenilenir."""
+        def apply(voices):
+            tr = [v for v in voices if v.get("Locale", "").startswith("tr-TR")]
+            names = voice_names(voices)
+            # Varsayılan: erkek sesi (Ahmet) varsa onu seç, yoksa ilk Türkçe ses
+            default_voice = next((v["ShortName"] for v in tr if "Ahmet" in v.get("ShortName", "")), tr[0]["ShortName"] if tr else None)
+            self.voice_combo.config(values=names)
+            cur = self.voice_var.get().split(" (")[0]
+            if default_voice and not any(n.split(" (")[0] == cur for n in names):
+                self.voice_var.set(default_voice)
+
+        voices, _ = load_cached_voices()
+        if voices:
+            apply(voices)
+        # İlk açılışta (önbellek yok) her durumda ağdan çekilir
+        refresh_voices_async(lambda v: self.root.after(0, lambda: apply(v)),
+                             max_age=VOICES_TTL_SEC if voices else -1)
 
     def log(self, msg: str):
-        self.log_text.insert(tk.END, msg + "\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Her thread'den çağrılabilir; satır kuyruğa eklenir, _drain_log ile widget'a yazılır."""
+        self._log_sink.write(msg)
+
+    def _drain_log(self):
+        """Kuyruktaki satırları tek insert ile yazar; widget max_lines satırı aşınca baştan kırpılır."""
+        lines = self._log_sink.drain()
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            count = int(self.log_text.index("end-1c").split(".")[0]) - 1
+            if count > self._log_sink.max_lines:
+                self.log_text.delete("1.0", "%d.0" % (count - self._log_sink.max_lines + 1))
+            self.log_text.see(tk.END)
+        self.root.after(LOG_DRAIN_MS, self._drain_log)
+
+    def _set_progress(self, ev: dict):
+        self.progress_var.set(ev.get("percent") or 0.0)
+        text = "%%%.0f · %s" % (ev.get("percent") or 0.0, ev.get("stage", ""))
+        if ev.get("speed"):
+            text += " · hız %.1fx" % ev["speed"]
+        if ev.get("eta") is not None:
+            text += " · kalan ~%d sn" % int(ev["eta"])
+        self.progress_label_var.set(text)
+
+    def cancel_render(self):
+        """Çalışan render'ın ffmpeg süreçlerini sonlandırır; geçici dosyalar render thread'inde temizlenir."""
+        if self._cancel_event is not None and not self._cancel_event.is_set():
+            self._cancel_event.set()
+            self.cancel_btn.config(state=tk.DISABLED)
+            self.log("İptal ediliyor...")
 
     def do_render(self):
         use_url = self.use_tiktok_url_var.get()
@@ -818,13 +686,8 @@ class VideoFactoryUI:
                 return
             if not images[i] or not os.path.isfile(images[i]):
                 if self.auto_image_var.get():
-                    folder = self.image_folder_var.get().strip()
-                    exts = [".png", ".jpg", ".jpeg"]
-                    count = 0
-                    if folder and os.path.isdir(folder):
-                        for e in os.scandir(folder):
-                            if e.is_file() and e.name.lower().endswith(tuple(exts)):
-                                count += 1
+                    index = get_folder_index(self.image_folder_var.get().strip(), IMAGE_EXTS)
+                    count = index.count() if index else 0
                     messagebox.showerror("Eksik", "Otomatik görsel: " + str(n) + " adet görsel gerekli, " + str(count) + " adet bulundu. Görsel klasörünü kontrol edin.")
                 else:
                     messagebox.showwarning("Eksik", "Yorum " + str(i + 1) + " için görsel seçin.")
@@ -839,6 +702,8 @@ class VideoFactoryUI:
             name_raw = name_raw[:80].rstrip()
         invalid = '<>:"/\\|?*'
         safe_name = "".join(("_" if ch in invalid else ch) for ch in name_raw).strip().rstrip(".") or "video"
+        if self.quality_resolution_var.get() == "draft":
+            safe_name += "_taslak"  # Taslak, onaylanacak final çıktının üzerine yazmaz
         out = os.path.join(base_dir, safe_name + ".mp4")
         self.out_var.set(out)
 
@@ -852,39 +717,77 @@ class VideoFactoryUI:
             except Exception:
                 pass
 
-        self._abort = False
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
         self.render_btn.config(state=tk.DISABLED)
+        self.cancel_btn.config(state=tk.NORMAL)
         self.log_text.delete("1.0", tk.END)
+        self.progress_var.set(0.0)
+        self.progress_label_var.set("")
+        if self.log_to_file:
+            log_path = self._log_sink.open_job_file("render", self.log_file_max_mb)
+            if log_path:
+                self.log("Log dosyası: " + log_path)
         cookies_file = self.cookies_var.get().strip()
         quality_resolution = self.quality_resolution_var.get()
         quality_fps = self.quality_fps_var.get()
+        render_mode = self.render_mode_var.get()
+        self._save_quality_settings()
+        max_workers = self.max_workers
+        use_cache = self.use_cache
+        offline = self.offline
+
+        # Aşama ölçümleri çıktının yanına yazılır (<çıktı>.trace.jsonl, her render'da yenilenir)
+        trace_path = os.path.splitext(out)[0] + ".trace.jsonl"
+        try:
+            os.remove(trace_path)
+        except OSError:
+            pass
+        tracer = Tracer(trace_path)
 
         def run():
             tmp_dir = tempfile.mkdtemp(prefix="vf_")
             video_path = video
             try:
                 if use_url:
-                    self.root.after(0, lambda: self.log("TikTok videosu indiriliyor..."))
-                    video_path = download_tiktok_video(
-                        tiktok_url, tmp_dir, cookies_file,
-                        log_cb=lambda s: self.root.after(0, lambda m=s: self.log(m)),
-                    )
+                    self.log("TikTok videosu indiriliyor...")
+                    downloaded = []
+                    with tracer.stage("download", outputs=downloaded) as rec:
+                        video_path = download_tiktok_video(
+                            tiktok_url, tmp_dir, cookies_file,
+                            log_cb=self.log, use_library=use_cache, offline=offline, record=rec,
+                            cancel_event=cancel_event,
+                        )
+                        downloaded.append(video_path)
+                    if cancel_event.is_set():
+                        self.log("İptal edildi.")
+                        return
                     if not video_path or not os.path.isfile(video_path):
                         self.root.after(0, lambda: messagebox.showerror("Hata", "Video indirilemedi. Gerekirse cookies.txt ekleyin."))
                         return
-                    self.root.after(0, lambda: self.log("İndirme tamamlandı."))
+                    self.log("İndirme tamamlandı.")
+                if cancel_event.is_set():
+                    self.log("İptal edildi.")
+                    return
 
                 voice = self.voice_var.get()
                 if " (" in voice:
                     voice = voice.split(" (")[0]
 
+                self.log("TTS üretiliyor (" + str(n) + " yorum)...")
+                tts_items = [(texts[i], voice, os.path.join(tmp_dir, "tts_" + str(i) + ".mp3")) for i in range(n)]
+                with tracer.stage("tts", outputs=[path for _, _, path in tts_items]):
+                    tts_results = generate_tts_many(
+                        tts_items, use_cache=use_cache,
+                        log_cb=self.log, cancel_event=cancel_event,
+                    )
+                if cancel_event.is_set():
+                    self.log("İptal edildi.")
+                    return
                 comment_segments = []
-                for i in range(n):
-                    self.root.after(0, lambda ii=i: self.log("TTS " + str(ii + 1) + " üretiliyor..."))
-                    tts_path = os.path.join(tmp_dir, "tts_" + str(i) + ".mp3")
-                    duration_sec = generate_tts(texts[i], voice, tts_path)
+                for i, (tts_path, duration_sec) in enumerate(tts_results):
                     if duration_sec <= 0:
-                        self.root.after(0, lambda: self.log("Hata: TTS süresi alınamadı (yorum " + str(i + 1) + ")."))
+                        self.log("Hata: TTS süresi alınamadı (yorum " + str(i + 1) + ").")
                         return
                     comment_segments.append({
                         "comment_image_path": images[i],
@@ -909,20 +812,27 @@ class VideoFactoryUI:
                     username=self.username_var.get().strip(),
                     comment_segments=comment_segments,
                     output_path=out,
-                    log_cb=lambda s: self.root.after(0, lambda m=s: self.log(m)),
+                    log_cb=self.log,
                     quality_resolution=quality_resolution,
                     quality_fps=quality_fps,
                     post_text=self.post_text_var.get().strip(),
                     avatar_size_ratio=self.avatar_size_var.get() / 100.0,
                     header_padding_ratio=self.header_padding_var.get() / 100.0,
                     comment_text_size_ratio=self.comment_text_size_var.get() / 100.0,
+                    render_mode=render_mode,
+                    max_workers=max_workers,
+                    use_cache=use_cache,
+                    progress_cb=lambda ev: self.root.after(0, lambda e=ev: self._set_progress(e)),
+                    cancel_event=cancel_event,
+                    tracer=tracer,
                 )
+                self.log("Aşamalar: " + ", ".join("%s=%.1fs" % kv for kv in ok.stage_seconds().items()))
                 if ok:
                     self.root.after(0, lambda: messagebox.showinfo("Tamam", f"Video kaydedildi:\n{out}"))
-                else:
+                elif not cancel_event.is_set():
                     self.root.after(0, lambda: messagebox.showerror("Hata", "Render başarısız. Loga bakın."))
             except Exception as e:
-                self.root.after(0, lambda: self.log("Hata: " + str(e)))
+                self.log("Hata: " + str(e))
                 self.root.after(0, lambda: messagebox.showerror("Hata", str(e)))
             finally:
                 try:
@@ -930,7 +840,9 @@ class VideoFactoryUI:
                     shutil.rmtree(tmp_dir, ignore_errors=True)
                 except Exception:
                     pass
+                self._log_sink.close_job_file()
                 self.root.after(0, lambda: self.render_btn.config(state=tk.NORMAL))
+                self.root.after(0, lambda: self.cancel_btn.config(state=tk.DISABLED))
 
         threading.Thread(target=run, daemon=True).start()
 
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""edge-tts ses kataloğu: settings.json yanında voices.json olarak saklanır (TTL), arka planda yenilenir."""
+import os
+import json
+import time
+import threading
+from typing import Optional, Callable
+
+from src.config import get_app_dir
+
+VOICES_FILE = "voices.json"
+VOICES_TTL_SEC = 7 * 24 * 3600
+
+
+def _voices_path():
+    return os.path.join(get_app_dir(), VOICES_FILE)
+
+
+def load_cached_voices() -> tuple:
+    """(ses listesi, alınma zamanı epoch). Dosya yoksa ([], 0)."""
+    path = _voices_path()
+    if not os.path.isfile(path):
+        return [], 0.0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            d = json.load(f)
+        return list(d.get("voices") or []), float(d.get("fetched_at", 0))
+    except Exception:
+        return [], 0.0
+
+
+def _save_voices(voices: list):
+    path = _voices_path()
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": time.time(), "voices": voices}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def fetch_voices() -> list:
+    """edge_tts.list_voices() (ağ) ile kataloğu çeker ve diske yazar. Hata durumunda exception fırlatır."""
+    import asyncio
+    import edge_tts
+    loop = asyncio.new_event_loop()
+    try:
+        voices = loop.run_until_complete(edge_tts.list_voices())
+    finally:
+        loop.close()
+    # Sadece kullandığımız alanlar saklanır
+    voices = [
+        {"ShortName": v.get("ShortName", ""), "Gender": v.get("Gender", ""), "Locale": v.get("Locale", "")}
+        for v in voices
+    ]
+    _save_voices(voices)
+    return voices
+
+
+def is_stale(fetched_at: float, max_age: float = VOICES_TTL_SEC) -> bool:
+    return time.time() - fetched_at > max_age
+
+
+def get_voices(max_age: float = VOICES_TTL_SEC, allow_network: bool = True) -> list:
+    """Önbellek tazeyse onu, değilse ağdan çekileni döner; ağ hatasında eski önbelleğe düşer."""
+    voices, fetched_at = load_cached_voices()
+    if voices and not is_stale(fetched_at, max_age):
+        return voices
+    if allow_network:
+        try:
+            return fetch_voices()
+        except Exception:
+            pass
+    return voices
+
+
+def refresh_voices_async(on_done: Callable[[list], None], max_age: float = VOICES_TTL_SEC) -> None:
+    """Önbellek eskiyse arka plan thread'inde yeniler; başarılıysa on_done(ses listesi) çağrılır (thread içinden)."""
+    _, fetched_at = load_cached_voices()
+    if not is_stale(fetched_at, max_age):
+        return
+
+    def work():
+        try:
+            voices = fetch_voices()
+        except Exception:
+            return
+        on_done(voices)
+    threading.Thread(target=work, daemon=True).start()
+
+
+def voice_names(voices: list, locale_prefix: str = "tr-TR") -> list:
+    """Combobox için "ShortName (Gender)" listesi."""
+    return [f"{v['ShortName']} ({v['Gender']})" for v in voices if v.get("Locale", "").startswith(locale_prefix)]
+
+
+def validate_voice(name: str, voices: Optional[list] = None) -> Optional[bool]:
+    """Ses katalogda var mı. Katalog hiç alınamadıysa (çevrimdışı, önbellek yok) None."""
+    if voices is None:
+        voices = get_voices(max_age=float("inf"))
+    if not voices:
+        return None
+    return any(v.get("ShortName") == name for v in voices)